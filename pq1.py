@@ -6,86 +6,604 @@ December 2021
 Let:
 n be the length of the list representing the biparental heap;
 p stand for parent, c stand for child, l stand for left and r stand for right;
-M,S stand for Munro, Suwanda, the authors of: _Implicit Data Structures for Fast Search and Update_ (1980).
-
-operation | uniparental binary heap | biparental binary heap
-------------------------------------------------------------
-min         O(1)                      O(1)
-max         O(n)                      O(sqrt(n))
-insert      O(log(n))                 O(sqrt(n))
-extract     O(log(n))                 O(sqrt(n))
-search      O(n)                      O(sqrt(n))
+M,S stand for Munro, Suwanda, the authors of: _Implicit Data Structures for Fast Search and Update_ (1980);
+Atkinson et al. stands for Atkinson, Sack, Santoro, Strothotte, the authors of: _Min-Max Heaps and Generalized Priority
+Queues_ (1986).
+
+operation   | uniparental binary heap | biparental binary heap | min-max heap
+-----------------------------------------------------------------------------
+min           O(1)                      O(1)                     O(1)
+max           O(n)                      O(sqrt(n))               O(1)
+insert        O(log(n))                 O(sqrt(n))               O(log(n))
+extract       O(log(n))                 O(sqrt(n))               O(log(n))
+extract max   O(n)                      O(sqrt(n))               O(log(n))
+delete        O(n)                      O(sqrt(n))               O(n)
+merge         O(m log(n))               O(m sqrt(n))             O(m log(n)), for the smaller length m
+replace       O(n)                      O(sqrt(n))               O(n)
+search        O(n)                      O(sqrt(n))               O(n)
+count below   -                         O(sqrt(n))               -
+range         -                         O(sqrt(n) + output)      -
+build         O(n), or O(n log(n))*     O(n log(n))              O(n)
+
+* numeric storage (an array.array, a NumPy array or a numeric memoryview) is sorted by NumPy rather than sifted, which
+is O(n log(n)) but, being in C, faster than O(n) sifts in Python.
+
+The operations below act in-place on a plain list, and a min-max heap is selected by passing min_max_layout in place
+of the number of parents. UniparentalHeap, BiparentalHeap and MinMaxHeap wrap the same routines around owned storage,
+which is a compact array.array when a typecode is given (e.g. 'q' or 'd') and a list otherwise. Neither counts
+anything by default: the *_and_get_time routines are instrumented twins of the plain routines, and are only used while
+a Probe is installed, either by instrumentation() or by passing one to a heap's constructor. IndexedHeap is a
+uniparental heap addressed by stable handles instead of by keys, for decrease-key heavy loops such as Dijkstra's.
+A uniparental heap can also be d-ary, by passing an arity other than two: its depth is then log(n) / log(arity).
+UniparentalPayloadHeap and BiparentalPayloadHeap keep numeric priorities in an array.array and their payloads in a
+parallel list, so that only priorities are ever compared, instead of (priority, payload) tuples. LazyHeap cancels keys
+in O(1) by marking them dead, and drops dead keys in bulk once there are enough of them.
 """
-parent_support = 'Only heaps in which nodes have either one or two parents are supported.'
+import heapq
+from array import array, typecodes
+from collections import Counter, namedtuple
+from contextlib import contextmanager
+from functools import partial
+from math import isqrt
+from time import perf_counter
+
+try:
+    import numpy as np
+except ImportError:  # NumPy only speeds up the validity checks on numeric storage
+    np = None
+
+min_max_layout = 'min-max'
+parent_support = 'Only heaps in which nodes have either one or two parents, or min-max heaps, are supported.'
+arity_support = 'Only uniparental heaps can have an arity, which must be an integer of at least two.'
+priority_support = 'Each payload needs a priority, either given alongside it or computed from it by a key function.'
+decrease_support = 'A key can only be decreased to a key which is at most the same size.'
+increase_support = 'A key can only be increased to a key which is at least the same size.'
+# how many scans of a heap in C (e.g. by list.index) take about as long as indexing its keys in a dict
+linear_search_batch_size = 16
 
 
 def get_min(heap, _=None):
     """operation: min (returning), time: O(1)"""
-    min_key, _ = get_min_and_time(heap)
-    return min_key
+    return heap[0] if len(heap) > 0 else None
 
 
-def get_max(heap, parents):
-    """operation: max (returning), time: O(n) if parents == 1 or O(sqrt(n)) if parents == 2"""
-    if parents == 1:
-        max_key, _ = get_uniparental_max_and_time(heap)
-    elif parents == 2:
-        max_key, _ = get_biparental_max_and_time(heap)
-    else:
-        return ValueError(parent_support)
-    return max_key
+def get_max(heap, parents, arity=2):
+    """operation: max (returning), time: O(n) if parents == 1, O(sqrt(n)) if parents == 2 or O(1) for a min-max heap"""
+    max_index = get_routines(parents, arity=arity).max_index(heap)
+    return None if max_index is None else heap[max_index]
 
 
-def perform_insertion(heap, key, parents):
+def perform_insertion(heap, key, parents, arity=2):
     """operation: insert (in-place), time: O(log(n)) if parents == 1 or O(sqrt(n)) if parents == 2"""
+    ascend = get_routines(parents, arity=arity).ascend
     heap.append(key)
-    if parents == 1:
-        _ = perform_uniparental_ascending_swap_and_get_time(heap, len(heap) - 1, 1)
-    elif parents == 2:
-        _ = perform_biparental_ascending_swap_and_get_time(heap, len(heap) - 1, 1)
-    else:
-        return ValueError(parent_support)
+    ascend(heap, len(heap) - 1)
 
 
-def perform_extraction_and_get_min(heap, parents):
+def perform_extraction_and_get_min(heap, parents, arity=2):
     """operation: extract (in-place & returning), time: O(log(n)) if parents == 1 or O(sqrt(n)) if parents == 2"""
-    root = None
-    if len(heap) == 1:
-        root = heap.pop()
-    elif len(heap) > 1:
-        # Lecture 8: "choose the last element as the new root ..."
-        heap[0], heap[-1] = heap[-1], heap[0]
-        root = heap.pop(-1)
-        # Lecture 8: "... then move it down if necessary"
-        if parents == 1:
-            _ = perform_uniparental_descending_swap_and_get_time(heap, 0, 1)
-        elif parents == 2:
-            _ = perform_biparental_descending_swap_and_get_time(heap, 0, 1)
-        else:
-            return ValueError(parent_support)
-    return root
+    return pop_min(heap, get_routines(parents, arity=arity).descend)
+
+
+def perform_extraction_and_get_max(heap, parents, arity=2):
+    """operation: extract max (in-place & returning), time: O(n), O(sqrt(n)) or O(log(n)) for a min-max heap"""
+    layout_routines = get_routines(parents, arity=arity)
+    max_index = layout_routines.max_index(heap)
+    if max_index is None:
+        return None
+    return pop_index(heap, max_index, layout_routines.ascend, layout_routines.descend)
+
+
+def perform_key_deletion(heap, key, parents, arity=2):
+    """operation: delete (in-place, returning whether the key was found), time: O(n) or O(sqrt(n)) if parents == 2"""
+    layout_routines = get_routines(parents, arity=arity)
+    return pop_key(heap, key, layout_routines.search, layout_routines.ascend, layout_routines.descend)
+
+
+def perform_key_replacement(heap, old_key, new_key, parents, arity=2):
+    """operation: replace (in-place, returning whether the key was found), time: O(n) or O(sqrt(n)) if parents == 2"""
+    layout_routines = get_routines(parents, arity=arity)
+    return change_key(heap, old_key, new_key, layout_routines.search, layout_routines.ascend, layout_routines.descend)
+
+
+def perform_key_decrease(heap, key, new_key, parents, arity=2):
+    """operation: decrease (in-place, returning whether the key was found), time: as for replace"""
+    if new_key > key:
+        raise ValueError(decrease_support)
+    return perform_key_replacement(heap, key, new_key, parents, arity)
+
+
+def perform_insertions(heap, keys, parents, arity=2):
+    """operation: insert many (in-place), time: O(m log(n)) or O(m sqrt(n)), or a rebuild if m is large enough"""
+    layout_routines = get_routines(parents, arity=arity)
+    insert_keys(heap, keys, parents, layout_routines.ascend, layout_routines.descend, arity)
+
+
+def perform_merge(heap, other, parents, arity=2):
+    """operation: merge with a heap of the same layout (in-place), time: O(m log(n)) or O(m sqrt(n)), or a rebuild"""
+    layout_routines = get_routines(parents, arity=arity)
+    merge_keys(heap, other, parents, layout_routines.ascend, layout_routines.descend, arity)
+
+
+def get_heap_from_sorted_runs(runs, parents, arity=2):
+    """operation: merge sorted runs (returning a new heap), time: O(n log(k)) for k runs"""
+    layout_routines = get_routines(parents, arity=arity)
+    heap = list(heapq.merge(*runs))
+    # sorted keys are already a valid heap or beap
+    if parents == min_max_layout:
+        heapify(heap, parents, layout_routines.descend)
+    return heap
+
+
+def perform_extractions_and_get_mins(heap, k, parents, arity=2):
+    """operation: extract k (in-place & returning in order), time: O(k log(n)) or O(k sqrt(n)), or a sort"""
+    return extract_keys(heap, k, parents, get_routines(parents, arity=arity).descend)
 
 
 def search_for_key_and_get_index(heap, key, parents):
     """operation: search (returning), time: O(n) if parents == 1 or O(sqrt(n)) if parents == 2"""
+    return get_routines(parents).search(heap, key)
+
+
+def search_for_keys_and_get_indices(heap, keys, parents):
+    """operation: search many (returning), time: O(m sqrt(n)) if parents == 2, or one O(n) pass"""
+    return search_keys(heap, keys, parents, get_routines(parents).search)
+
+
+def count_less_than(beap, key):
+    """operation: count below (returning how many keys are smaller than the key), time: O(sqrt(n))"""
+    return sum(get_biparental_row_counts(beap, key, True))
+
+
+def rank(beap, key):
+    """operation: rank (returning how many keys are at most the key), time: O(sqrt(n))"""
+    return sum(get_biparental_row_counts(beap, key, False))
+
+
+def iter_range(beap, low_key, high_key):
+    """operation: range (returning an iterator over the keys from low_key to high_key, row by row of the triangular
+    matrix, i.e. neither in storage order nor in sorted order), time: O(sqrt(n) + output)"""
+    low_counts = get_biparental_row_counts(beap, low_key, True)
+    high_counts = get_biparental_row_counts(beap, high_key, False)
+    numeric_view = get_numeric_view(beap)
+    if numeric_view is not None:
+        return iter(numeric_view[get_biparental_row_indices(low_counts, high_counts)].tolist())
+    return (beap[((row + column) ** 2 + row + column) // 2 + row] for row in range(len(low_counts))
+            for column in range(low_counts[row], high_counts[row]))
+
+
+def perform_heapification(heap, parents, arity=2):
+    """operation: build (in-place), time: O(n) if parents == 1, or O(n log(n)) if its storage is numeric (which NumPy
+    sorts), or O(n log(n)) if parents == 2"""
+    heapify(heap, parents, get_routines(parents, arity=arity).descend, arity)
+
+
+def is_valid(heap, parents, arity=2):
+    """operation: validity (returning), time: O(n)"""
+    return get_first_violation_index(heap, parents, arity) is None
+
+
+def get_first_violation_index(heap, parents, arity=2):
+    """operation: validity (returning the first index whose key is smaller than a parent's, if any), time: O(n)"""
+    check_arity(parents, arity)
+    numeric_view = get_numeric_view(heap)
     if parents == 1:
-        index, _ = uniparental_search_for_key_and_get_index_and_time(heap, key)
+        if numeric_view is not None:
+            return get_vectorised_uniparental_violation_index(numeric_view, arity)
+        return get_uniparental_violation_index(heap, arity)
     elif parents == 2:
-        index, _ = biparental_search_for_key_and_get_index_and_time(heap, key)
-    else:
-        return ValueError(parent_support)
-    return index
+        if numeric_view is not None:
+            return get_vectorised_biparental_violation_index(numeric_view)
+        return get_biparental_violation_index(heap)
+    elif parents == min_max_layout:
+        return get_min_max_violation_index(heap)
+    raise ValueError(parent_support)
 
 
-def is_valid(heap, parents):
-    if not heap:
-        return True
-    elif parents == 1:
-        return uniparental_recursive_validity(heap, 0)
-    elif parents == 2:
-        return biparental_recursive_validity(heap, 0)
+Routines = namedtuple('Routines', ['max_index', 'ascend', 'descend', 'search'])
+
+_instrumented_routines = None  # installed by instrumentation()
+_installed_probe = None  # the probe behind _instrumented_routines
+
+
+class Probe:
+    """counters for the instrumented routines: steps (recursions or iterations), comparisons and swaps"""
+    __slots__ = ('steps', 'comparisons', 'swaps')
+
+    def __init__(self, steps=0):
+        self.steps = steps
+        self.comparisons = 0
+        self.swaps = 0
+
+    def __repr__(self):
+        return 'Probe(steps={}, comparisons={}, swaps={})'.format(self.steps, self.comparisons, self.swaps)
+
+    def reset(self):
+        self.steps = self.comparisons = self.swaps = 0
+
+
+@contextmanager
+def instrumentation(probe=None):
+    # counts every operation of the functional API, and of heaps constructed, inside the block into one probe
+    global _instrumented_routines, _installed_probe
+    probe = Probe() if probe is None else probe
+    previous_routines, previous_probe = _instrumented_routines, _installed_probe
+    _instrumented_routines, _installed_probe = get_instrumented_routines(probe), probe
+    try:
+        yield probe
+    finally:
+        _instrumented_routines, _installed_probe = previous_routines, previous_probe
+
+
+def get_routines(parents, probe=None, arity=2):
+    # chooses a layout's routines, which are the plain ones unless a probe has been passed or installed
+    check_arity(parents, arity)
+    if arity != 2:
+        return get_d_ary_routines(arity, _installed_probe if probe is None else probe)
+    if probe is not None:
+        layout_routines = get_instrumented_routines(probe)
+    elif _instrumented_routines is not None:
+        layout_routines = _instrumented_routines
     else:
-        return ValueError(parent_support)
+        layout_routines = routines
+    if parents not in layout_routines:
+        raise ValueError(parent_support)
+    return layout_routines[parents]
+
+
+def check_arity(parents, arity):
+    if arity != 2 and (parents != 1 or not isinstance(arity, int) or arity < 2):
+        raise ValueError(arity_support)
+
+
+def get_d_ary_routines(arity, probe=None):
+    # the uniparental routines with arity children per parent in place of two
+    if probe is None:
+        if arity not in d_ary_routines:
+            d_ary_routines[arity] = Routines(partial(get_uniparental_max_index, arity=arity),
+                                             partial(perform_d_ary_ascending_swap, arity=arity),
+                                             partial(perform_d_ary_descending_swap, arity=arity), uniparental_search)
+        return d_ary_routines[arity]
+    return instrument(Routines(partial(get_uniparental_max_index_and_time, arity=arity),
+                               partial(perform_d_ary_ascending_swap_and_get_time, arity=arity),
+                               partial(perform_d_ary_descending_swap_and_get_time, arity=arity),
+                               uniparental_search_for_key_and_get_index_and_time), probe)
+
+
+def get_instrumented_routines(probe):
+    # wraps each layout's *_and_get_time routines so that their times accumulate in the probe as steps
+    return {parents: instrument(layout_routines, probe) for parents, layout_routines in timed_routines.items()}
+
+
+def instrument(layout_timed_routines, probe):
+    max_index_and_get_time, ascend_and_get_time, descend_and_get_time, search_and_get_time = layout_timed_routines
+
+    def get_max_index(heap):
+        max_index, time = max_index_and_get_time(heap, probe)
+        probe.steps += time
+        return max_index
+
+    def ascend(heap, index):
+        probe.steps += ascend_and_get_time(heap, index, 0, probe)
+
+    def descend(heap, index):
+        probe.steps += descend_and_get_time(heap, index, 0, probe)
+
+    def search(heap, key):
+        index, time = search_and_get_time(heap, key, probe)
+        probe.steps += time
+        return index
+
+    return Routines(get_max_index, ascend, descend, search)
+
+
+def get_uniparental_max_index(heap, arity=2):
+    # the maximum is a leaf, and the leaves are the keys after the last parent
+    if len(heap) == 0:
+        return None
+    return max(range(get_leaf_index(len(heap), arity), len(heap)), key=heap.__getitem__)
+
+
+def get_biparental_max_index(beap):
+    # M, S: "The maximum is in one of the last sqrt(2n) locations."
+    search_size = isqrt(2 * len(beap))
+    if search_size == 0:
+        return None
+    return max(range(len(beap) - search_size, len(beap)), key=beap.__getitem__)
+
+
+def perform_uniparental_ascending_swap(heap, index):
+    key = heap[index]
+    while index != 0:
+        parent_index = (index - 1) // 2
+        parent_key = heap[parent_index]
+        if parent_key <= key:
+            break
+        heap[index] = parent_key
+        index = parent_index
+    heap[index] = key
+
+
+def perform_biparental_ascending_swap(beap, c_index):
+    key = beap[c_index]
+    # the level and column are carried from step to step, so that each parent is found by arithmetic alone
+    level = get_biparental_level(c_index)
+    column = c_index - (level ** 2 + level) // 2
+    while level > 0:
+        # M,S: "... smaller than either of its parents, it is interchanged with the larger parent"
+        if column == 0:
+            max_p_index = c_index - level
+        elif column == level or not beap[c_index - level - 1] < beap[c_index - level]:
+            max_p_index = c_index - level - 1
+            column -= 1
+        else:
+            max_p_index = c_index - level
+        max_p_key = beap[max_p_index]
+        if not key < max_p_key:
+            break
+        beap[c_index] = max_p_key
+        c_index = max_p_index
+        level -= 1
+    beap[c_index] = key
+
+
+def perform_uniparental_descending_swap(heap, index):
+    size = len(heap)
+    key = heap[index]
+    l_child_index = 2 * index + 1
+    while l_child_index < size:
+        r_child_index = l_child_index + 1
+        min_child_index = l_child_index \
+            if r_child_index >= size or heap[r_child_index] > heap[l_child_index] \
+            else r_child_index
+        min_child_key = heap[min_child_index]
+        if not key > min_child_key:
+            break
+        heap[index] = min_child_key
+        index = min_child_index
+        l_child_index = 2 * index + 1
+    heap[index] = key
+
+
+def perform_biparental_descending_swap(beap, p_index):
+    size = len(beap)
+    key = beap[p_index]
+    level = get_biparental_level(p_index)
+    l_c_index = p_index + level + 1
+    while l_c_index < size:
+        # if larger than either child, then interchange with smaller child
+        r_c_index = l_c_index + 1
+        min_c_index = r_c_index if r_c_index < size and not beap[l_c_index] < beap[r_c_index] else l_c_index
+        min_c_key = beap[min_c_index]
+        if not key > min_c_key:
+            break
+        beap[p_index] = min_c_key
+        p_index = min_c_index
+        level += 1
+        l_c_index = p_index + level + 1
+    beap[p_index] = key
+
+
+def uniparental_search(heap, key):
+    if not hasattr(heap, 'index'):
+        # NumPy arrays and memoryviews have no index method, but NumPy can compare their keys in bulk
+        numeric_view = get_numeric_view(heap)
+        if numeric_view is None:
+            return next((index for index in range(len(heap)) if heap[index] == key), None)
+        indices = np.flatnonzero(numeric_view == key)
+        return int(indices[0]) if indices.size else None
+    try:
+        return heap.index(key)
+    except ValueError:
+        return None
+
+
+def biparental_search(beap, key):
+    # M,S: "... view the structure as an “upper-left” triangular matrix"
+    size = len(beap)
+    if size == 0:
+        return None
+    level = get_biparental_level(size - 1)
+    l_edge_index, r_edge_index = get_biparental_block_indices(level)
+    if r_edge_index != size - 1:
+        level -= 1
+        r_edge_index = l_edge_index - 1
+    # M,S: "... start searching for an element ... at the top right corner of the matrix"
+    index = r_edge_index
+    column = level
+    while True:
+        index_key = beap[index]
+        if key == index_key:
+            return index
+        if key < index_key:
+            if column == 0:
+                return None
+            # M,S: "... move left one position along the row"
+            index -= level + 1
+            level -= 1
+            column -= 1
+        elif key > index_key:
+            if index + level + 1 < size:
+                # M,S: "... move down one position along the column"
+                index += level + 1
+                level += 1
+            elif column > 0:
+                # M,S: "... move left and down one position each"
+                index -= 1
+                column -= 1
+            else:
+                return None
+        else:
+            return None
+
+
+def is_min_level(index):
+    # the levels of a min-max heap alternate, starting with a min level at the root
+    return (index + 1).bit_length() % 2 == 1
+
+
+def get_min_max_max_index(heap):
+    # the maximum is the root if it is alone, or else the larger of the root's children, the first max level
+    if len(heap) <= 2:
+        return len(heap) - 1 if len(heap) > 0 else None
+    return 2 if heap[1] < heap[2] else 1
+
+
+def perform_min_max_ascending_swap(heap, index):
+    if index == 0:
+        return
+    key = heap[index]
+    parent_index = (index - 1) // 2
+    parent_key = heap[parent_index]
+    minimum = is_min_level(index)
+    # Atkinson et al.: a key on the wrong side of its parent swaps with it, then continues among the parent's levels
+    if key > parent_key if minimum else key < parent_key:
+        heap[index] = parent_key
+        index = parent_index
+        minimum = not minimum
+    # ... and the rest of the way it only moves past its grandparents
+    while index > 2:
+        grandparent_index = (index - 3) // 4
+        grandparent_key = heap[grandparent_index]
+        if not (key < grandparent_key if minimum else key > grandparent_key):
+            break
+        heap[index] = grandparent_key
+        index = grandparent_index
+    heap[index] = key
+
+
+def perform_min_max_descending_swap(heap, index):
+    size = len(heap)
+    key = heap[index]
+    minimum = is_min_level(index)
+    l_child_index = 2 * index + 1
+    while l_child_index < size:
+        # Atkinson et al.: the key is compared with the smallest (or largest) of its children and grandchildren
+        extreme_index = l_child_index
+        extreme_key = heap[l_child_index]
+        for descendant_index in (l_child_index + 1, 2 * l_child_index + 1, 2 * l_child_index + 2,
+                                 2 * l_child_index + 3, 2 * l_child_index + 4):
+            if descendant_index >= size:
+                break
+            descendant_key = heap[descendant_index]
+            if descendant_key < extreme_key if minimum else descendant_key > extreme_key:
+                extreme_index, extreme_key = descendant_index, descendant_key
+        if not (extreme_key < key if minimum else extreme_key > key):
+            break
+        heap[index] = extreme_key
+        index = extreme_index
+        if extreme_index <= l_child_index + 1:
+            # a child is on the opposite kind of level, and so below it there is nothing left to order
+            break
+        # a grandchild's parent is on the opposite kind of level, which the key may now belong on instead
+        parent_index = (extreme_index - 1) // 2
+        parent_key = heap[parent_index]
+        if key > parent_key if minimum else key < parent_key:
+            heap[parent_index] = key
+            key = parent_key
+        l_child_index = 2 * index + 1
+    heap[index] = key
+
+
+def perform_d_ary_ascending_swap(heap, index, arity):
+    key = heap[index]
+    while index != 0:
+        parent_index = (index - 1) // arity
+        parent_key = heap[parent_index]
+        if parent_key <= key:
+            break
+        heap[index] = parent_key
+        index = parent_index
+    heap[index] = key
+
+
+def perform_d_ary_descending_swap(heap, index, arity):
+    # the children of a parent are adjacent in storage, so a larger arity trades depth for a longer scan per level
+    size = len(heap)
+    key = heap[index]
+    f_child_index = arity * index + 1
+    while f_child_index < size:
+        min_child_index, min_child_key = f_child_index, heap[f_child_index]
+        for child_index in range(f_child_index + 1, min(f_child_index + arity, size)):
+            child_key = heap[child_index]
+            if child_key < min_child_key:
+                min_child_index, min_child_key = child_index, child_key
+        if not key > min_child_key:
+            break
+        heap[index] = min_child_key
+        index = min_child_index
+        f_child_index = arity * index + 1
+    heap[index] = key
+
+
+def perform_uniparental_ascending_swap_with_payloads(heap, payloads, index):
+    # as perform_uniparental_ascending_swap, with each key's payload moving alongside it but never compared
+    key, payload = heap[index], payloads[index]
+    while index != 0:
+        parent_index = (index - 1) // 2
+        parent_key = heap[parent_index]
+        if parent_key <= key:
+            break
+        heap[index], payloads[index] = parent_key, payloads[parent_index]
+        index = parent_index
+    heap[index], payloads[index] = key, payload
+
+
+def perform_uniparental_descending_swap_with_payloads(heap, payloads, index):
+    size = len(heap)
+    key, payload = heap[index], payloads[index]
+    l_child_index = 2 * index + 1
+    while l_child_index < size:
+        r_child_index = l_child_index + 1
+        min_child_index = l_child_index \
+            if r_child_index >= size or heap[r_child_index] > heap[l_child_index] \
+            else r_child_index
+        min_child_key = heap[min_child_index]
+        if not key > min_child_key:
+            break
+        heap[index], payloads[index] = min_child_key, payloads[min_child_index]
+        index = min_child_index
+        l_child_index = 2 * index + 1
+    heap[index], payloads[index] = key, payload
+
+
+def perform_biparental_ascending_swap_with_payloads(beap, payloads, c_index):
+    key, payload = beap[c_index], payloads[c_index]
+    level = get_biparental_level(c_index)
+    column = c_index - (level ** 2 + level) // 2
+    while level > 0:
+        if column == 0:
+            max_p_index = c_index - level
+        elif column == level or not beap[c_index - level - 1] < beap[c_index - level]:
+            max_p_index = c_index - level - 1
+            column -= 1
+        else:
+            max_p_index = c_index - level
+        max_p_key = beap[max_p_index]
+        if not key < max_p_key:
+            break
+        beap[c_index], payloads[c_index] = max_p_key, payloads[max_p_index]
+        c_index = max_p_index
+        level -= 1
+    beap[c_index], payloads[c_index] = key, payload
+
+
+def perform_biparental_descending_swap_with_payloads(beap, payloads, p_index):
+    size = len(beap)
+    key, payload = beap[p_index], payloads[p_index]
+    level = get_biparental_level(p_index)
+    l_c_index = p_index + level + 1
+    while l_c_index < size:
+        r_c_index = l_c_index + 1
+        min_c_index = r_c_index if r_c_index < size and not beap[l_c_index] < beap[r_c_index] else l_c_index
+        min_c_key = beap[min_c_index]
+        if not key > min_c_key:
+            break
+        beap[p_index], payloads[p_index] = min_c_key, payloads[min_c_index]
+        p_index = min_c_index
+        level += 1
+        l_c_index = p_index + level + 1
+    beap[p_index], payloads[p_index] = key, payload
 
 
 def get_min_and_time(heap):
@@ -95,103 +613,197 @@ def get_min_and_time(heap):
     return root, 1
 
 
-def get_uniparental_max_and_time(heap):
+def get_uniparental_max_index_and_time(heap, probe=None, arity=2, size=None):
+    # size, if given, limits the heap to a prefix of its storage (which is itself a heap), without copying it
+    if probe is None:
+        probe = Probe()
+    if size is None:
+        size = len(heap)
     time = 1
-    max_key = None
-    if len(heap) > 0:
-        max_key = heap[0]
-    for key in heap[1:]:
+    if size == 0:
+        return None, time
+    max_index = get_leaf_index(size, arity)
+    for index in range(max_index + 1, size):
         time += 1
-        if key > max_key:
-            max_key = key
-    return max_key, time
+        probe.comparisons += 1
+        if heap[index] > heap[max_index]:
+            max_index = index
+    return max_index, time
 
 
-def get_biparental_max_and_time(beap):
+def get_biparental_max_index_and_time(beap, probe=None, size=None):
+    # size, if given, limits the beap to a prefix of its storage (which is itself a beap), without copying it
+    if probe is None:
+        probe = Probe()
+    if size is None:
+        size = len(beap)
     time = 0
-    max_key = None
     # M, S: "The maximum is in one of the last sqrt(2n) locations."
-    search_size = int((2 * len(beap)) ** (1 / 2))
-    if search_size > 0:
-        search_space = beap[-search_size:]
-        max_key = search_space[0]
-        for key in search_space[1:]:
-            time += 1
-            if key > max_key:
-                max_key = key
-    return max_key, time
-
-
-def perform_uniparental_ascending_swap_and_get_time(heap, index, time):
-    if index != 0:
+    search_size = isqrt(2 * size)
+    if search_size == 0:
+        return None, time
+    max_index = size - search_size
+    for index in range(max_index + 1, size):
+        time += 1
+        probe.comparisons += 1
+        if beap[index] > beap[max_index]:
+            max_index = index
+    return max_index, time
+
+
+def get_uniparental_max_and_time(heap, probe=None, size=None):
+    max_index, time = get_uniparental_max_index_and_time(heap, probe, size=size)
+    return None if max_index is None else heap[max_index], time
+
+
+def get_biparental_max_and_time(beap, probe=None, size=None):
+    max_index, time = get_biparental_max_index_and_time(beap, probe, size)
+    return None if max_index is None else beap[max_index], time
+
+
+def perform_uniparental_ascending_swap_and_get_time(heap, index, time, probe=None):
+    if probe is None:
+        probe = Probe()
+    while index != 0:
         time += 1
         parent_index = (index - 1) // 2
-        if heap[parent_index] > heap[index]:
-            heap[parent_index], heap[index] = heap[index], heap[parent_index]
-        return perform_uniparental_ascending_swap_and_get_time(heap, parent_index, time)
+        probe.comparisons += 1
+        if heap[parent_index] <= heap[index]:
+            # every ancestor is at most the parent, so the path to the root is already ordered
+            break
+        heap[parent_index], heap[index] = heap[index], heap[parent_index]
+        probe.swaps += 1
+        index = parent_index
     return time
 
 
-def perform_biparental_ascending_swap_and_get_time(beap, c_index, time):
-    l_p_index, r_p_index = get_biparental_parents(c_index)
-    if l_p_index is not None or r_p_index is not None:
+def perform_biparental_ascending_swap_and_get_time(beap, c_index, time, probe=None):
+    if probe is None:
+        probe = Probe()
+    level = get_biparental_level(c_index)
+    column = c_index - (level ** 2 + level) // 2
+    while level > 0:
         time += 1
         # M,S: "... smaller than either of its parents, it is interchanged with the larger parent"
-        if l_p_index is not None:
-            if r_p_index is not None:
-                max_p_index = r_p_index if beap[l_p_index] < beap[r_p_index] else l_p_index
-            else:
-                max_p_index = l_p_index
+        if column == 0:
+            max_p_index = c_index - level
         else:
-            max_p_index = r_p_index
-        if beap[c_index] < beap[max_p_index]:
-            beap[c_index], beap[max_p_index] = beap[max_p_index], beap[c_index]
-            return perform_biparental_ascending_swap_and_get_time(beap, max_p_index, time)
+            if column < level:
+                probe.comparisons += 1
+            if column == level or not beap[c_index - level - 1] < beap[c_index - level]:
+                max_p_index = c_index - level - 1
+                column -= 1
+            else:
+                max_p_index = c_index - level
+        probe.comparisons += 1
+        if not beap[c_index] < beap[max_p_index]:
+            return time
+        beap[c_index], beap[max_p_index] = beap[max_p_index], beap[c_index]
+        probe.swaps += 1
+        c_index = max_p_index
+        level -= 1
     return time
 
 
-def perform_uniparental_descending_swap_and_get_time(heap, index, time):
+def perform_uniparental_descending_swap_and_get_time(heap, index, time, probe=None):
+    if probe is None:
+        probe = Probe()
+    size = len(heap)
     l_child_index = 2 * index + 1
-    if index < len(heap) - 1 and l_child_index < len(heap):
+    while l_child_index < size:
         time += 1
-        r_child_index = 2 * index + 2
+        r_child_index = l_child_index + 1
+        if r_child_index < size:
+            probe.comparisons += 1
         min_child_index = l_child_index \
-            if r_child_index >= len(heap) or heap[r_child_index] > heap[l_child_index] \
+            if r_child_index >= size or heap[r_child_index] > heap[l_child_index] \
             else r_child_index
-        if heap[index] > heap[min_child_index]:
-            heap[index], heap[min_child_index] = heap[min_child_index], heap[index]
-            return perform_uniparental_descending_swap_and_get_time(heap, min_child_index, time)
+        probe.comparisons += 1
+        if not heap[index] > heap[min_child_index]:
+            break
+        heap[index], heap[min_child_index] = heap[min_child_index], heap[index]
+        probe.swaps += 1
+        index = min_child_index
+        l_child_index = 2 * index + 1
     return time
 
 
-def perform_biparental_descending_swap_and_get_time(beap, p_index, time):
-    l_c_index, r_c_index = get_biparental_children(p_index, len(beap) - 1)
-    if l_c_index is not None or r_c_index is not None:
+def perform_biparental_descending_swap_and_get_time(beap, p_index, time, probe=None):
+    if probe is None:
+        probe = Probe()
+    size = len(beap)
+    level = get_biparental_level(p_index)
+    l_c_index = p_index + level + 1
+    while l_c_index < size:
         time += 1
         # if larger than either child, then interchange with smaller child
-        if l_c_index is not None:
-            if r_c_index is not None:
-                min_c_index = l_c_index if beap[l_c_index] < beap[r_c_index] else r_c_index
-            else:
-                min_c_index = l_c_index
+        r_c_index = l_c_index + 1
+        if r_c_index < size:
+            probe.comparisons += 1
+            min_c_index = l_c_index if beap[l_c_index] < beap[r_c_index] else r_c_index
         else:
-            min_c_index = r_c_index
-        if min_c_index is not None and beap[p_index] > beap[min_c_index]:
-            beap[p_index], beap[min_c_index] = beap[min_c_index], beap[p_index]
-            return perform_biparental_descending_swap_and_get_time(beap, min_c_index, time)
+            min_c_index = l_c_index
+        probe.comparisons += 1
+        if not beap[p_index] > beap[min_c_index]:
+            return time
+        beap[p_index], beap[min_c_index] = beap[min_c_index], beap[p_index]
+        probe.swaps += 1
+        p_index = min_c_index
+        level += 1
+        l_c_index = p_index + level + 1
     return time
 
 
-def uniparental_search_for_key_and_get_index_and_time(heap, key):
+def perform_d_ary_ascending_swap_and_get_time(heap, index, time, probe=None, arity=2):
+    if probe is None:
+        probe = Probe()
+    while index != 0:
+        time += 1
+        parent_index = (index - 1) // arity
+        probe.comparisons += 1
+        if heap[parent_index] <= heap[index]:
+            break
+        heap[parent_index], heap[index] = heap[index], heap[parent_index]
+        probe.swaps += 1
+        index = parent_index
+    return time
+
+
+def perform_d_ary_descending_swap_and_get_time(heap, index, time, probe=None, arity=2):
+    if probe is None:
+        probe = Probe()
+    size = len(heap)
+    f_child_index = arity * index + 1
+    while f_child_index < size:
+        time += 1
+        min_child_index = f_child_index
+        for child_index in range(f_child_index + 1, min(f_child_index + arity, size)):
+            probe.comparisons += 1
+            if heap[child_index] < heap[min_child_index]:
+                min_child_index = child_index
+        probe.comparisons += 1
+        if not heap[index] > heap[min_child_index]:
+            break
+        heap[index], heap[min_child_index] = heap[min_child_index], heap[index]
+        probe.swaps += 1
+        index = min_child_index
+        f_child_index = arity * index + 1
+    return time
+
+
+def uniparental_search_for_key_and_get_index_and_time(heap, key, probe=None):
+    if probe is None:
+        probe = Probe()
     time = 1
     for index in range(len(heap)):
         time += 1
+        probe.comparisons += 1
         if heap[index] == key:
             return index, time
     return None, time
 
 
-def biparental_search_for_key_and_get_index_and_time(beap, key):
+def biparental_search_for_key_and_get_index_and_time(beap, key, probe=None):
     time = 1
     # M,S: "... view the structure as an “upper-left” triangular matrix"
     if len(beap) == 0:
@@ -202,64 +814,325 @@ def biparental_search_for_key_and_get_index_and_time(beap, key):
     _, r_penultimate_edge_index = get_biparental_block_indices(penultimate_level)
     # M,S: "... start searching for an element ... at the top right corner of the matrix"
     top_right_corner = r_ultimate_edge_index if r_ultimate_edge_index == len(beap) - 1 else r_penultimate_edge_index
-    return biparental_recursive_search(beap, key, top_right_corner, time)
+    return biparental_iterative_search(beap, key, top_right_corner, time, probe)
 
 
-def biparental_recursive_search(beap, key, index, time):
-    if key == beap[index]:
-        return index, time
-    mid_level = get_biparental_level(index)
-    if mid_level >= 0:
+def biparental_iterative_search(beap, key, index, time, probe=None):
+    if probe is None:
+        probe = Probe()
+    size = len(beap)
+    level = get_biparental_level(index)
+    column = index - (level ** 2 + level) // 2
+    while True:
+        probe.comparisons += 1
+        if key == beap[index]:
+            return index, time
         time += 1
-        l_mid_edge_index, _ = get_biparental_block_indices(mid_level)
-        column = index - l_mid_edge_index
-        top_level = mid_level - 1
-        if key < beap[index] and index != l_mid_edge_index and top_level >= 0:
+        probe.comparisons += 1
+        if key < beap[index] and column > 0:
             # M,S: "... move left one position along the row"
-            l_top_edge_index, _ = get_biparental_block_indices(top_level)
-            new_index = l_top_edge_index + column - 1
-            return biparental_recursive_search(beap, key, new_index, time)
+            index -= level + 1
+            level -= 1
+            column -= 1
         elif key > beap[index]:
-            bot_level = mid_level + 1
-            new_index = get_biparental_block_indices(bot_level)[0] + column
-            if new_index < len(beap):
+            if index + level + 1 < size:
                 # M,S: "... move down one position along the column"
-                return biparental_recursive_search(beap, key, new_index, time)
-            elif index - 1 >= l_mid_edge_index:
+                index += level + 1
+                level += 1
+            elif column > 0:
                 # M,S: "... move left and down one position each"
-                return biparental_recursive_search(beap, key, index - 1, time)
-    return None, time
+                index -= 1
+                column -= 1
+            else:
+                return None, time
+        else:
+            return None, time
 
 
-def uniparental_recursive_validity(heap, index):
-    if index < len(heap):
-        key = heap[index]
+def get_min_max_max_index_and_time(heap, probe=None):
+    if probe is None:
+        probe = Probe()
+    if len(heap) <= 2:
+        return len(heap) - 1 if len(heap) > 0 else None, 1
+    probe.comparisons += 1
+    return 2 if heap[1] < heap[2] else 1, 1
+
+
+def perform_min_max_ascending_swap_and_get_time(heap, index, time, probe=None):
+    if probe is None:
+        probe = Probe()
+    if index == 0:
+        return time
+    time += 1
+    parent_index = (index - 1) // 2
+    minimum = is_min_level(index)
+    probe.comparisons += 1
+    if heap[index] > heap[parent_index] if minimum else heap[index] < heap[parent_index]:
+        heap[index], heap[parent_index] = heap[parent_index], heap[index]
+        probe.swaps += 1
+        index = parent_index
+        minimum = not minimum
+    while index > 2:
+        time += 1
+        grandparent_index = (index - 3) // 4
+        probe.comparisons += 1
+        if not (heap[index] < heap[grandparent_index] if minimum else heap[index] > heap[grandparent_index]):
+            break
+        heap[index], heap[grandparent_index] = heap[grandparent_index], heap[index]
+        probe.swaps += 1
+        index = grandparent_index
+    return time
+
+
+def perform_min_max_descending_swap_and_get_time(heap, index, time, probe=None):
+    if probe is None:
+        probe = Probe()
+    size = len(heap)
+    minimum = is_min_level(index)
+    l_child_index = 2 * index + 1
+    while l_child_index < size:
+        time += 1
+        extreme_index = l_child_index
+        for descendant_index in (l_child_index + 1, 2 * l_child_index + 1, 2 * l_child_index + 2,
+                                 2 * l_child_index + 3, 2 * l_child_index + 4):
+            if descendant_index >= size:
+                break
+            probe.comparisons += 1
+            descendant_key, extreme_key = heap[descendant_index], heap[extreme_index]
+            if descendant_key < extreme_key if minimum else descendant_key > extreme_key:
+                extreme_index = descendant_index
+        probe.comparisons += 1
+        if not (heap[extreme_index] < heap[index] if minimum else heap[extreme_index] > heap[index]):
+            break
+        heap[index], heap[extreme_index] = heap[extreme_index], heap[index]
+        probe.swaps += 1
+        index = extreme_index
+        if extreme_index <= l_child_index + 1:
+            break
+        parent_index = (extreme_index - 1) // 2
+        probe.comparisons += 1
+        if heap[index] > heap[parent_index] if minimum else heap[index] < heap[parent_index]:
+            heap[index], heap[parent_index] = heap[parent_index], heap[index]
+            probe.swaps += 1
         l_child_index = 2 * index + 1
-        r_child_index = 2 * index + 2
-        l_child_property = True if l_child_index >= len(heap) or heap[l_child_index] >= key else False
-        r_child_property = True if r_child_index >= len(heap) or heap[r_child_index] >= key else False
-        return (l_child_property and r_child_property
-                and uniparental_recursive_validity(heap, l_child_index)
-                and uniparental_recursive_validity(heap, r_child_index))
+    return time
+
+
+def pop_min(heap, descend):
+    root = None
+    if len(heap) == 1:
+        root = heap.pop()
+    elif len(heap) > 1:
+        # Lecture 8: "choose the last element as the new root ..."
+        root = heap[0]
+        heap[0] = heap.pop()
+        # Lecture 8: "... then move it down if necessary"
+        descend(heap, 0)
+    return root
+
+
+def pop_index(heap, index, ascend, descend):
+    # the last key fills the gap, and moves up if it is too small for its new place or down if it is too large
+    key = heap.pop()
+    if index < len(heap):
+        key, heap[index] = heap[index], key
+        ascend(heap, index)
+        descend(heap, index)
+    return key
+
+
+def pop_key(heap, key, search, ascend, descend):
+    index = search(heap, key)
+    if index is None:
+        return False
+    pop_index(heap, index, ascend, descend)
     return True
 
 
-def biparental_recursive_validity(beap, p_index):
-    # checks whether the children of the given parent (if they exist) are at least the size of the parent, recursively
-    l_c_index, r_c_index = get_biparental_children(p_index, len(beap) - 1)
-    if l_c_index is not None or r_c_index is not None:
-        if not (False if l_c_index is not None and beap[l_c_index] < beap[p_index] else True) or not (
-                False if r_c_index is not None and beap[r_c_index] < beap[p_index] else True):
-            return False
-        if l_c_index is not None and r_c_index is not None:
-            return biparental_recursive_validity(beap, l_c_index) and biparental_recursive_validity(beap, r_c_index)
-        if l_c_index is not None:
-            return biparental_recursive_validity(beap, l_c_index)
-        if r_c_index is not None:
-            return biparental_recursive_validity(beap, r_c_index)
+def change_key(heap, old_key, new_key, search, ascend, descend):
+    index = search(heap, old_key)
+    if index is None:
+        return False
+    # only one of these moves the new key, but which one depends on the layout as well as on the keys
+    heap[index] = new_key
+    ascend(heap, index)
+    descend(heap, index)
     return True
 
 
+def get_sift_cost(size, parents):
+    # the rough number of steps in one sift or beap search, for weighing a batch of them against one O(n) pass
+    return max(1, isqrt(2 * size)) if parents == 2 else max(1, size.bit_length())
+
+
+def insert_keys(heap, keys, parents, ascend, descend, arity=2):
+    first_index = len(heap)
+    heap.extend(keys)
+    if (len(heap) - first_index) * get_sift_cost(len(heap), parents) >= len(heap):
+        heapify(heap, parents, descend, arity)
+    else:
+        # each appended key only ever moves among the keys before it
+        for index in range(first_index, len(heap)):
+            ascend(heap, index)
+
+
+def merge_keys(heap, other, parents, ascend, descend, arity=2):
+    # the smaller of the two heaps is inserted into the larger, whose keys are moved into storage first if need be
+    if len(other) > len(heap):
+        smaller = list(heap)
+        del heap[:]
+        heap.extend(other)
+    else:
+        smaller = other
+    insert_keys(heap, smaller, parents, ascend, descend, arity)
+
+
+def extract_keys(heap, k, parents, descend):
+    k = min(k, len(heap))
+    if k * get_sift_cost(len(heap), parents) >= len(heap):
+        # sorted keys satisfy either binary layout, so what remains after the k smallest needs no repair
+        sort_keys(heap)
+        mins = list(heap[:k])
+        del heap[:k]
+        if parents == min_max_layout:
+            heapify(heap, parents, descend)
+        return mins
+    return [pop_min(heap, descend) for _ in range(k)]
+
+
+def search_keys(heap, keys, parents, search):
+    keys = list(keys)
+    if parents == 2 and len(keys) * get_sift_cost(len(heap), parents) < len(heap) or \
+            parents != 2 and len(keys) < linear_search_batch_size:
+        return [search(heap, key) for key in keys]
+    # one pass over the heap resolves every key at once
+    indices = {}
+    try:
+        for index in reversed(range(len(heap))):
+            indices[heap[index]] = index
+    except TypeError:
+        return [search(heap, key) for key in keys]
+    return [indices.get(key) for key in keys]
+
+
+def heapify(heap, parents, descend, arity=2):
+    is_plain = descend is perform_uniparental_descending_swap or getattr(descend, 'func', None) is \
+        perform_d_ary_descending_swap
+    if parents == 2 or is_plain and get_numeric_view(heap) is not None:
+        # sorted keys satisfy any of these layouts, and NumPy sorts numeric keys faster than Python can sift them
+        sort_keys(heap)
+    elif descend is perform_uniparental_descending_swap and type(heap) is list:
+        # the same layout, sifted bottom-up in C
+        heapq.heapify(heap)
+    else:
+        # Floyd: sift down every parent, from the last one up to the root
+        for index in reversed(range(get_leaf_index(len(heap), arity))):
+            descend(heap, index)
+
+
+def get_leaf_index(size, arity):
+    # the index of the first leaf, which is one past the parent of the last key
+    return (size - 2) // arity + 1 if size > 1 else 0
+
+
+def sort_keys(heap):
+    numeric_view = get_numeric_view(heap)
+    if numeric_view is not None:
+        numeric_view.sort()
+    elif isinstance(heap, list):
+        heap.sort()
+    elif isinstance(heap, array):
+        heap[:] = array(heap.typecode, sorted(heap))
+    else:
+        heap[:] = sorted(heap)
+
+
+def get_typecode(keys):
+    # the array.array typecode storing a NumPy array's keys in the same bytes, or None if there is no such typecode
+    typecode = keys.dtype.char
+    if typecode in typecodes and array(typecode).itemsize == keys.dtype.itemsize:
+        return typecode
+    return None
+
+
+def get_numeric_view(heap):
+    # a NumPy view of numeric storage, without copying, or None where NumPy is missing or keys may be any objects
+    if np is None or len(heap) == 0:
+        return None
+    if isinstance(heap, np.ndarray):
+        return heap if heap.dtype.kind in 'biuf' else None
+    if isinstance(heap, array) and heap.typecode not in 'uw':
+        return np.frombuffer(heap, dtype=heap.typecode)
+    if isinstance(heap, memoryview) and heap.format in typecodes and heap.format not in 'uw':
+        # e.g. a cast of shared memory, which the routines index faster than a NumPy array
+        return np.frombuffer(heap, dtype=heap.format)
+    return None
+
+
+def get_uniparental_violation_index(heap, arity=2):
+    for index in range(1, len(heap)):
+        if heap[index] < heap[(index - 1) // arity]:
+            return index
+    return None
+
+
+def get_biparental_violation_index(beap):
+    # one pass in index order, carrying the level and column so that both parents are found by arithmetic
+    level, column = 1, 0
+    for index in range(1, len(beap)):
+        key = beap[index]
+        if column > 0 and key < beap[index - level - 1] or column < level and key < beap[index - level]:
+            return index
+        if column == level:
+            level, column = level + 1, 0
+        else:
+            column += 1
+    return None
+
+
+def get_min_max_violation_index(heap):
+    # a key is ordered with respect to all its descendants if it is with respect to its children and grandchildren
+    for index in range(1, len(heap)):
+        key = heap[index]
+        parent_key = heap[(index - 1) // 2]
+        if is_min_level(index):
+            if key > parent_key or index > 2 and key < heap[(index - 3) // 4]:
+                return index
+        elif key < parent_key or index > 2 and key > heap[(index - 3) // 4]:
+            return index
+    return None
+
+
+def get_vectorised_uniparental_violation_index(keys, arity=2):
+    # the first children of every parent, then the second children and so on, are each compared with them in bulk
+    violations = []
+    for offset in range(1, arity + 1):
+        children = keys[offset::arity]
+        offset_violations = np.flatnonzero(children < keys[:len(children)])
+        if offset_violations.size:
+            violations.append(arity * offset_violations[0] + offset)
+    return int(min(violations)) if violations else None
+
+
+def get_vectorised_biparental_violation_index(keys):
+    # each level is compared in bulk with the level above it, shifted by one column for the left parents
+    size = len(keys)
+    level = 1
+    l_edge_index = 1
+    while l_edge_index < size:
+        children = keys[l_edge_index:min(l_edge_index + level + 1, size)]
+        parents = keys[l_edge_index - level:l_edge_index]
+        width = min(len(children), level)
+        violations = np.zeros(len(children), dtype=bool)
+        violations[:width] = children[:width] < parents[:width]
+        violations[1:] |= children[1:] < parents[:len(children) - 1]
+        if violations.any():
+            return l_edge_index + int(np.argmax(violations))
+        l_edge_index += level + 1
+        level += 1
+    return None
+
+
 def get_biparental_block_indices(level):
     # calculate which indices in the triangular beap's one-dimensional representation form the edges of the given level
     l_edge_index = (level ** 2 + level) // 2
@@ -267,50 +1140,624 @@ def get_biparental_block_indices(level):
     return l_edge_index, r_edge_index
 
 
+def get_biparental_row_counts(beap, key, strict):
+    # M,S: the beap as a triangular matrix, whose row i and column j hold the key at level i + j and column i, so
+    # that a key's parents are above it and to its left: every row and column is sorted, and how many keys of a row
+    # are below the key (or at most it, if not strict) never grows from one row to the next, as in a staircase search
+    numeric_view = get_numeric_view(beap)
+    if numeric_view is not None:
+        return get_vectorised_biparental_row_counts(numeric_view, key, strict)
+    size = len(beap)
+    if size == 0:
+        return []
+    last_level = get_biparental_level(size - 1)
+    last_column = size - 1 - (last_level ** 2 + last_level) // 2
+    counts = [0] * (last_level + 1)
+    count = last_level + 1
+    for row in range(last_level + 1):
+        count = min(count, last_level - row + (row <= last_column))
+        while count > 0:
+            level = row + count - 1
+            row_key = beap[(level ** 2 + level) // 2 + row]
+            if row_key < key if strict else not key < row_key:
+                break
+            count -= 1
+        if count == 0:
+            break
+        counts[row] = count
+    return counts
+
+
+def get_vectorised_biparental_row_counts(keys, key, strict):
+    # every row is binary searched at once, in O(log(n)) rounds which each gather one key from each of O(sqrt(n)) rows
+    size = len(keys)
+    if size == 0:
+        return []
+    last_level = get_biparental_level(size - 1)
+    last_column = size - 1 - (last_level ** 2 + last_level) // 2
+    rows = np.arange(last_level + 1)
+    low_counts = np.zeros(last_level + 1, dtype=np.int64)
+    high_counts = last_level - rows + (rows <= last_column)
+    while True:
+        active = low_counts < high_counts
+        if not active.any():
+            return low_counts.tolist()
+        middles = (low_counts + high_counts) // 2
+        levels = rows + middles
+        middle_keys = keys[np.where(active, (levels ** 2 + levels) // 2 + rows, 0)]
+        is_below = (middle_keys < key) if strict else (middle_keys <= key)
+        low_counts = np.where(active & is_below, middles + 1, low_counts)
+        high_counts = np.where(active & ~is_below, middles, high_counts)
+
+
+def get_biparental_row_indices(low_counts, high_counts):
+    # the indices of the keys from column low_counts[i] up to high_counts[i] of each row i, gathered without a loop
+    rows = np.arange(len(low_counts))
+    lengths = np.maximum(np.array(high_counts, dtype=np.int64) - low_counts, 0)
+    rows = np.repeat(rows, lengths)
+    starts = np.cumsum(lengths) - lengths
+    columns = np.arange(lengths.sum()) - np.repeat(starts, lengths) + np.repeat(low_counts, lengths)
+    levels = rows + columns
+    return (levels ** 2 + levels) // 2 + rows
+
+
 def get_biparental_level(index):
     # calculate the level of the triangular beap where the specified index can be found
     if index < 0:
         raise ValueError('Cannot get the level of a negative index.')
-    if index == 0:
-        return 0
-    level = (2 * index) ** (1 / 2)
-    level = int(level)
-    l_edge_index, r_edge_index = get_biparental_block_indices(level)
-    # dealing with off-by-one errors
-    if index in range(l_edge_index, r_edge_index):
-        return level
-    else:
-        return level - 1
+    # the largest level whose left edge index, (level ** 2 + level) // 2, is at most the index, in exact integers
+    return (isqrt(8 * index + 1) - 1) // 2
 
 
 def get_biparental_children(p_index, max_index):
     # retrieves two, one or no indices of the given parent's children according to whether they exist
-    p_level = get_biparental_level(p_index)
-    c_level = p_level + 1
-    ultimate_level = get_biparental_level(max_index)
-    if c_level <= ultimate_level:
-        p_l_edge_index, _ = get_biparental_block_indices(p_level)
-        c_l_edge_index, _ = get_biparental_block_indices(c_level)
-        p_column = p_index - p_l_edge_index
-        l_c_index = c_l_edge_index + p_column
-        r_c_index = c_l_edge_index + p_column + 1
-        if l_c_index > max_index:
-            l_c_index = None
-        if r_c_index > max_index:
-            r_c_index = None
-        return l_c_index, r_c_index
-    return None, None
+    l_c_index = p_index + get_biparental_level(p_index) + 1
+    r_c_index = l_c_index + 1
+    return l_c_index if l_c_index <= max_index else None, r_c_index if r_c_index <= max_index else None
 
 
 def get_biparental_parents(c_index):
     # retrieves two, one or no indices of the given child's parents according to whether they exist
     c_level = get_biparental_level(c_index)
-    p_level = c_level - 1
-    if p_level >= 0:
-        c_l_edge_index, c_r_edge_index = get_biparental_block_indices(c_level)
-        p_l_edge_index, _ = get_biparental_block_indices(p_level)
-        c_column = c_index - c_l_edge_index
-        l_p_index = p_l_edge_index + c_column - 1 if c_index > c_l_edge_index else None
-        r_p_index = p_l_edge_index + c_column if c_index < c_r_edge_index else None
-        return l_p_index, r_p_index
-    return None, None
+    c_column = c_index - (c_level ** 2 + c_level) // 2
+    l_p_index = c_index - c_level - 1 if c_column > 0 else None
+    r_p_index = c_index - c_level if c_column < c_level else None
+    return l_p_index, r_p_index
+
+
+routines = {
+    1: Routines(get_uniparental_max_index, perform_uniparental_ascending_swap, perform_uniparental_descending_swap,
+                uniparental_search),
+    2: Routines(get_biparental_max_index, perform_biparental_ascending_swap, perform_biparental_descending_swap,
+                biparental_search),
+    min_max_layout: Routines(get_min_max_max_index, perform_min_max_ascending_swap, perform_min_max_descending_swap,
+                             uniparental_search)
+}
+
+payload_routines = {
+    1: (perform_uniparental_ascending_swap_with_payloads, perform_uniparental_descending_swap_with_payloads),
+    2: (perform_biparental_ascending_swap_with_payloads, perform_biparental_descending_swap_with_payloads)
+}
+
+d_ary_routines = {}  # filled by get_d_ary_routines, one arity at a time
+
+timed_routines = {
+    1: Routines(get_uniparental_max_index_and_time, perform_uniparental_ascending_swap_and_get_time,
+                perform_uniparental_descending_swap_and_get_time, uniparental_search_for_key_and_get_index_and_time),
+    2: Routines(get_biparental_max_index_and_time, perform_biparental_ascending_swap_and_get_time,
+                perform_biparental_descending_swap_and_get_time, biparental_search_for_key_and_get_index_and_time),
+    min_max_layout: Routines(get_min_max_max_index_and_time, perform_min_max_ascending_swap_and_get_time,
+                             perform_min_max_descending_swap_and_get_time,
+                             uniparental_search_for_key_and_get_index_and_time)
+}
+
+
+class BinaryHeap:
+    """implicit binary heap over owned storage; the layout's routines are chosen once, on construction"""
+    __slots__ = ('_keys', '_arity', '_max_index', '_ascend', '_descend', '_search')
+    parents = None
+
+    def __init__(self, keys=(), typecode=None, probe=None, arity=2):
+        self._keys = list(keys) if typecode is None else array(typecode, keys)
+        self._arity = arity
+        self._max_index, self._ascend, self._descend, self._search = get_routines(self.parents, probe, arity)
+        heapify(self._keys, self.parents, self._descend, arity)
+
+    @classmethod
+    def from_iterable(cls, keys, typecode=None, probe=None, arity=2):
+        return cls(keys, typecode, probe, arity)
+
+    @classmethod
+    def from_array(cls, keys, probe=None, arity=2):
+        # a NumPy array's bytes are copied into storage once, where NumPy can sort them in place if the layout allows
+        if isinstance(keys, array):
+            return cls(keys, keys.typecode, probe, arity)
+        typecode = get_typecode(keys)
+        if typecode is None:
+            return cls(keys.tolist(), None, probe, arity)
+        heap = cls((), typecode, probe, arity)
+        heap._keys.frombytes(keys.tobytes())
+        heapify(heap._keys, heap.parents, heap._descend, arity)
+        return heap
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        # keys in storage order, not in sorted order
+        return iter(self._keys)
+
+    def __bool__(self):
+        return len(self._keys) > 0
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, list(self._keys))
+
+    def get_min(self):
+        keys = self._keys
+        return keys[0] if keys else None
+
+    def get_max(self):
+        keys = self._keys
+        max_index = self._max_index(keys)
+        return None if max_index is None else keys[max_index]
+
+    def insert(self, key):
+        keys = self._keys
+        keys.append(key)
+        self._ascend(keys, len(keys) - 1)
+
+    def extract_min(self):
+        keys = self._keys
+        if not keys:
+            return None
+        last = keys.pop()
+        if not keys:
+            return last
+        root = keys[0]
+        keys[0] = last
+        self._descend(keys, 0)
+        return root
+
+    def extract_max(self):
+        keys = self._keys
+        max_index = self._max_index(keys)
+        if max_index is None:
+            return None
+        return pop_index(keys, max_index, self._ascend, self._descend)
+
+    def search(self, key):
+        return self._search(self._keys, key)
+
+    def delete_key(self, key):
+        return pop_key(self._keys, key, self._search, self._ascend, self._descend)
+
+    def replace_key(self, old_key, new_key):
+        return change_key(self._keys, old_key, new_key, self._search, self._ascend, self._descend)
+
+    def decrease_key(self, key, new_key):
+        if new_key > key:
+            raise ValueError(decrease_support)
+        return change_key(self._keys, key, new_key, self._search, self._ascend, self._descend)
+
+    def insert_many(self, keys):
+        insert_keys(self._keys, keys, self.parents, self._ascend, self._descend, self._arity)
+
+    def merge(self, other):
+        # another heap of the same layout is already ordered, but any other keys are simply inserted
+        if isinstance(other, BinaryHeap) and other.parents == self.parents and other._arity == self._arity:
+            merge_keys(self._keys, other._keys, self.parents, self._ascend, self._descend, self._arity)
+        else:
+            insert_keys(self._keys, other, self.parents, self._ascend, self._descend, self._arity)
+
+    def extract_k_smallest(self, k):
+        return extract_keys(self._keys, k, self.parents, self._descend)
+
+    def search_many(self, keys):
+        return search_keys(self._keys, keys, self.parents, self._search)
+
+    def is_valid(self):
+        return is_valid(self._keys, self.parents, self._arity)
+
+    def get_first_violation_index(self):
+        return get_first_violation_index(self._keys, self.parents, self._arity)
+
+
+class UniparentalHeap(BinaryHeap):
+    __slots__ = ()
+    parents = 1
+
+
+class BiparentalHeap(BinaryHeap):
+    __slots__ = ()
+    parents = 2
+
+    def count_less_than(self, key):
+        return count_less_than(self._keys, key)
+
+    def rank(self, key):
+        return rank(self._keys, key)
+
+    def iter_range(self, low_key, high_key):
+        return iter_range(self._keys, low_key, high_key)
+
+
+class MinMaxHeap(BinaryHeap):
+    __slots__ = ()
+    parents = min_max_layout
+
+
+class IndexedHeap:
+    """uniparental binary heap whose keys are addressed by stable handles, which a handle->slot map follows through
+    every sift, so that contains is O(1) and decrease_key, increase_key and remove are O(log(n))"""
+    __slots__ = ('_keys', '_handles', '_slots', '_next_handle')
+
+    def __init__(self, keys=()):
+        self._keys = []
+        self._handles = []
+        self._slots = {}
+        self._next_handle = 0
+        for key in keys:
+            self.insert(key)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __bool__(self):
+        return len(self._keys) > 0
+
+    def __contains__(self, handle):
+        return handle in self._slots
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, list(zip(self._handles, self._keys)))
+
+    def contains(self, handle):
+        return handle in self._slots
+
+    def get_key(self, handle):
+        return self._keys[self._slots[handle]]
+
+    def get_min(self):
+        keys = self._keys
+        return keys[0] if keys else None
+
+    def get_min_handle(self):
+        handles = self._handles
+        return handles[0] if handles else None
+
+    def insert(self, key, handle=None):
+        # a handle is any hashable the caller already has (e.g. a vertex), or else a fresh integer
+        if handle is None:
+            # skipping integers which the caller has already supplied as handles
+            while self._next_handle in self._slots:
+                self._next_handle += 1
+            handle = self._next_handle
+            self._next_handle += 1
+        elif handle in self._slots:
+            raise KeyError(handle)
+        self._keys.append(key)
+        self._handles.append(handle)
+        self._slots[handle] = len(self._keys) - 1
+        self._ascend(len(self._keys) - 1)
+        return handle
+
+    def extract_min(self):
+        item = self.extract_min_item()
+        return None if item is None else item[1]
+
+    def extract_min_item(self):
+        if not self._keys:
+            return None
+        handle = self._handles[0]
+        return handle, self.remove(handle)
+
+    def decrease_key(self, handle, key):
+        index = self._slots[handle]
+        if key > self._keys[index]:
+            raise ValueError(decrease_support)
+        self._keys[index] = key
+        self._ascend(index)
+
+    def increase_key(self, handle, key):
+        index = self._slots[handle]
+        if key < self._keys[index]:
+            raise ValueError(increase_support)
+        self._keys[index] = key
+        self._descend(index)
+
+    def remove(self, handle):
+        keys, handles, slots = self._keys, self._handles, self._slots
+        index = slots.pop(handle)
+        key = keys[index]
+        last_key, last_handle = keys.pop(), handles.pop()
+        if index < len(keys):
+            keys[index], handles[index] = last_key, last_handle
+            slots[last_handle] = index
+            self._ascend(index)
+            self._descend(slots[last_handle])
+        return key
+
+    def is_valid(self):
+        slots = self._slots
+        return (get_uniparental_violation_index(self._keys) is None and len(slots) == len(self._handles)
+                and all(slots[handle] == index for index, handle in enumerate(self._handles)))
+
+    def _ascend(self, index):
+        # the hole technique, with each key's handle moving alongside it
+        keys, handles, slots = self._keys, self._handles, self._slots
+        key, handle = keys[index], handles[index]
+        while index > 0:
+            p_index = (index - 1) // 2
+            p_key = keys[p_index]
+            if not key < p_key:
+                break
+            keys[index] = p_key
+            handles[index] = p_handle = handles[p_index]
+            slots[p_handle] = index
+            index = p_index
+        keys[index], handles[index] = key, handle
+        slots[handle] = index
+
+    def _descend(self, index):
+        keys, handles, slots = self._keys, self._handles, self._slots
+        size = len(keys)
+        key, handle = keys[index], handles[index]
+        c_index = 2 * index + 1
+        while c_index < size:
+            r_index = c_index + 1
+            if r_index < size and keys[r_index] < keys[c_index]:
+                c_index = r_index
+            c_key = keys[c_index]
+            if not c_key < key:
+                break
+            keys[index] = c_key
+            handles[index] = c_handle = handles[c_index]
+            slots[c_handle] = index
+            index = c_index
+            c_index = 2 * index + 1
+        keys[index], handles[index] = key, handle
+        slots[handle] = index
+
+
+class PayloadHeap:
+    """heap of payloads ordered by numeric priorities, which are stored apart from them in a parallel array"""
+    __slots__ = ('_keys', '_payloads', '_key', '_max_index', '_ascend', '_descend')
+    parents = None
+
+    def __init__(self, payloads=(), priorities=None, key=None, typecode='d'):
+        # priorities are either given in the payloads' order or computed from each payload by the key function
+        payloads = list(payloads)
+        if priorities is None:
+            if key is None:
+                raise TypeError(priority_support)
+            priorities = map(key, payloads)
+        self._keys = list(priorities) if typecode is None else array(typecode, priorities)
+        if len(self._keys) != len(payloads):
+            raise ValueError(priority_support)
+        self._payloads = payloads
+        self._key = key
+        if self.parents not in payload_routines:
+            raise ValueError(parent_support)
+        self._max_index = get_routines(self.parents).max_index
+        self._ascend, self._descend = payload_routines[self.parents]
+        self._sort()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __bool__(self):
+        return len(self._keys) > 0
+
+    def __iter__(self):
+        # (priority, payload) pairs in storage order, not in sorted order
+        return zip(self._keys, self._payloads)
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, list(self))
+
+    def get_min(self):
+        return self._payloads[0] if self._keys else None
+
+    def get_min_item(self):
+        return (self._keys[0], self._payloads[0]) if self._keys else None
+
+    def get_max(self):
+        max_index = self._max_index(self._keys)
+        return None if max_index is None else self._payloads[max_index]
+
+    def get_max_item(self):
+        max_index = self._max_index(self._keys)
+        return None if max_index is None else (self._keys[max_index], self._payloads[max_index])
+
+    def insert(self, payload, priority=None):
+        if priority is None:
+            if self._key is None:
+                raise TypeError(priority_support)
+            priority = self._key(payload)
+        keys, payloads = self._keys, self._payloads
+        keys.append(priority)
+        payloads.append(payload)
+        self._ascend(keys, payloads, len(keys) - 1)
+
+    def extract_min(self):
+        item = self._pop_index(0) if self._keys else None
+        return None if item is None else item[1]
+
+    def extract_min_item(self):
+        return self._pop_index(0) if self._keys else None
+
+    def extract_max(self):
+        item = self.extract_max_item()
+        return None if item is None else item[1]
+
+    def extract_max_item(self):
+        max_index = self._max_index(self._keys)
+        return None if max_index is None else self._pop_index(max_index)
+
+    def is_valid(self):
+        return len(self._keys) == len(self._payloads) and is_valid(self._keys, self.parents)
+
+    def _pop_index(self, index):
+        keys, payloads = self._keys, self._payloads
+        last_key, last_payload = keys.pop(), payloads.pop()
+        if index == len(keys):
+            return last_key, last_payload
+        item = keys[index], payloads[index]
+        keys[index], payloads[index] = last_key, last_payload
+        self._ascend(keys, payloads, index)
+        self._descend(keys, payloads, index)
+        return item
+
+    def _sort(self):
+        # sorted priorities satisfy either layout, and the payloads follow them through one permutation
+        keys = self._keys
+        numeric_view = get_numeric_view(keys)
+        if numeric_view is not None:
+            order = numeric_view.argsort(kind='stable')
+            numeric_view[:] = numeric_view[order]
+        else:
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            sorted_keys = [keys[index] for index in order]
+            keys[:] = array(keys.typecode, sorted_keys) if isinstance(keys, array) else sorted_keys
+        payloads = self._payloads
+        self._payloads = [payloads[index] for index in order]
+
+
+class UniparentalPayloadHeap(PayloadHeap):
+    __slots__ = ()
+    parents = 1
+
+
+class BiparentalPayloadHeap(PayloadHeap):
+    __slots__ = ()
+    parents = 2
+
+
+heap_classes = {1: UniparentalHeap, 2: BiparentalHeap, min_max_layout: MinMaxHeap}
+
+
+def get_heap_class(parents):
+    if parents not in heap_classes:
+        raise ValueError(parent_support)
+    return heap_classes[parents]
+
+
+def decrement_count(counter, key):
+    # a count which reaches 0 is deleted, so that a Counter only holds keys which are still present
+    count = counter[key] - 1
+    if count:
+        counter[key] = count
+    else:
+        del counter[key]
+
+
+class LazyHeap:
+    """heap of pq1 in which a cancelled key is only marked dead, in O(1), and is skipped or dropped later: one at a
+    time when it reaches the root (or is the maximum), or all at once by compaction, once dead keys make up more than
+    compaction_ratio of the storage"""
+    __slots__ = ('_heap', '_live', '_dead', '_tombstones', 'compaction_ratio', 'compaction_times')
+
+    def __init__(self, keys=(), parents=1, typecode=None, compaction_ratio=0.5, arity=2):
+        # keys must be hashable, since a key stands for its own handle
+        self._heap = get_heap_class(parents)(keys, typecode, arity=arity)
+        self._live = Counter(self._heap)
+        self._dead = Counter()
+        self._tombstones = 0
+        self.compaction_ratio = compaction_ratio
+        self.compaction_times = []  # seconds taken by each compaction
+
+    def __len__(self):
+        return len(self._heap) - self._tombstones
+
+    def __bool__(self):
+        return len(self._heap) > self._tombstones
+
+    def __contains__(self, key):
+        return self._live[key] > 0
+
+    def __repr__(self):
+        return '{}({}, tombstones={})'.format(type(self).__name__, list(self._heap), self._tombstones)
+
+    @property
+    def parents(self):
+        return self._heap.parents
+
+    @property
+    def tombstones(self):
+        return self._tombstones
+
+    def insert(self, key):
+        self._heap.insert(key)
+        self._live[key] += 1
+
+    def cancel(self, key):
+        """marks one copy of the key dead, returning whether there was a live one"""
+        if self._live[key] == 0:
+            return False
+        decrement_count(self._live, key)
+        self._dead[key] += 1
+        self._tombstones += 1
+        if self._tombstones > self.compaction_ratio * len(self._heap):
+            self.compact()
+        return True
+
+    def get_min(self):
+        self._drop_dead_min()
+        return self._heap.get_min()
+
+    def extract_min(self):
+        self._drop_dead_min()
+        key = self._heap.extract_min()
+        if key is not None:
+            decrement_count(self._live, key)
+        return key
+
+    def get_max(self):
+        max_index = self._get_live_max_index()
+        return None if max_index is None else self._heap._keys[max_index]
+
+    def extract_max(self):
+        heap = self._heap
+        max_index = self._get_live_max_index()
+        if max_index is None:
+            return None
+        key = pop_index(heap._keys, max_index, heap._ascend, heap._descend)
+        decrement_count(self._live, key)
+        return key
+
+    def is_valid(self):
+        return self._heap.is_valid()
+
+    def compact(self):
+        # every dead key is dropped in one pass, and the rest are rebuilt into a heap in O(n)
+        start = perf_counter()
+        heap, dead = self._heap, self._dead
+        live_keys = []
+        for key in heap:
+            if dead[key] > 0:
+                decrement_count(dead, key)
+            else:
+                live_keys.append(key)
+        del heap._keys[:]
+        heap._keys.extend(live_keys)
+        heapify(heap._keys, heap.parents, heap._descend, heap._arity)
+        self._dead = Counter()
+        self._tombstones = 0
+        self.compaction_times.append(perf_counter() - start)
+
+    def _drop_dead_min(self):
+        heap, dead = self._heap, self._dead
+        while self._tombstones and heap and dead[heap.get_min()] > 0:
+            decrement_count(dead, heap.extract_min())
+            self._tombstones -= 1
+
+    def _get_live_max_index(self):
+        # a dead maximum is removed for good, so each tombstone is only ever passed over once
+        heap, dead = self._heap, self._dead
+        while True:
+            max_index = heap._max_index(heap._keys)
+            if max_index is None or dead[heap._keys[max_index]] == 0:
+                return max_index
+            decrement_count(dead, pop_index(heap._keys, max_index, heap._ascend, heap._descend))
+            self._tombstones -= 1
@@ -4,12 +4,43 @@ Tests for Priority Queues
 December 2021
 """
 
+import asyncio
 import math
+import multiprocessing
+import queue
+import os
 import random
+import struct
+import tempfile
+import threading
+from time import perf_counter
+from array import array
+
 import matplotlib.pyplot as plt
+import numpy
 from unittest import TestCase
 
-import p3
+try:
+    import resource
+except ImportError:  # page faults are only counted where getrusage exists
+    resource = None
+
+import pq1
+import pq_bench
+import pq_concurrent
+import pq_memory
+import pq_mmap
+import pq_sharded
+import pq_trace
+
+
+def insert_into_shards(heap, keys):
+    # runs in a child process, which reattaches to the shards of its parent's heap
+    heap.insert_many(keys[:len(keys) // 2])
+    for key in keys[len(keys) // 2:]:
+        heap.insert(key)
+    heap.close()
+
 
 valid_uniparental_heaps = [
     [],
@@ -58,6 +89,26 @@ invalid_biparental_heaps = [
     [10, 9, 8, 7, 6, 5, 11]
 ]
 
+valid_min_max_heaps = [
+    [],
+    [1],
+    [1, 5],
+    [1, 5, 3],
+    [1, 1, 1, 1],
+    [2, 7, 9, 3, 4, 5, 6],
+    [1, 9, 8, 2, 3, 4],
+    [5, 65, 80, 25, 37, 8, 15, 57, 36, 45, 59, 20, 14, 32, 18, 28, 30, 34, 27, 39, 38, 45, 50, 15, 12, 13, 10, 30, 31,
+     16, 17]
+]
+
+invalid_min_max_heaps = [
+    [2, 1],
+    [1, 3, 2, 4],
+    [1, 9, 8, 0],
+    [1, 9, 8, 2, 10],
+    [1, 9, 8, 2, 3, 4, 5, 0]
+]
+
 biparental_level_to_indices = {
     0: range(0, 1),
     1: range(1, 3),
@@ -91,31 +142,33 @@ def get_time_bound(heap, complexity_class):
 class UnitTests(TestCase):
 
     def test_min_correctness(self):
-        self.assertEqual(None, p3.get_min([]))
-        for heap in valid_uniparental_heaps + valid_biparental_heaps:
+        self.assertEqual(None, pq1.get_min([]))
+        for heap in valid_uniparental_heaps + valid_biparental_heaps + valid_min_max_heaps:
             if heap:
-                self.assertEqual(min(heap), p3.get_min(heap))
+                self.assertEqual(min(heap), pq1.get_min(heap))
 
     def test_min_efficiency(self):
         for heap in valid_uniparental_heaps + valid_biparental_heaps:
-            _, time = p3.get_min_and_time(heap)
+            _, time = pq1.get_min_and_time(heap)
             self.assertLessEqual(time, get_time_bound(_, 'constant'))
 
     def test_max_correctness(self):
         parent_configurations = [
             [1, valid_uniparental_heaps],
-            [2, valid_biparental_heaps]
+            [2, valid_biparental_heaps],
+            [pq1.min_max_layout, valid_min_max_heaps]
         ]
         for config in parent_configurations:
-            self.assertEqual(None, p3.get_max([], config[0]))
+            self.assertEqual(None, pq1.get_max([], config[0]))
             for heap in config[1]:
                 if heap:
-                    self.assertEqual(max(heap), p3.get_max(heap, config[0]))
+                    self.assertEqual(max(heap), pq1.get_max(heap, config[0]))
 
     def test_max_efficiency(self):
         parent_configurations = [
-            [valid_uniparental_heaps, p3.get_uniparental_max_and_time, 'linear'],
-            [valid_biparental_heaps, p3.get_biparental_max_and_time, 'square root']
+            [valid_uniparental_heaps, pq1.get_uniparental_max_and_time, 'linear'],
+            [valid_biparental_heaps, pq1.get_biparental_max_and_time, 'square root'],
+            [valid_min_max_heaps, pq1.get_min_max_max_index_and_time, 'constant']
         ]
         for config in parent_configurations:
             for heap in config[0]:
@@ -125,7 +178,8 @@ class UnitTests(TestCase):
     def test_insert_correctness(self):
         parent_configurations = [
             [1],
-            [2]
+            [2],
+            [pq1.min_max_layout]
         ]
         for config in parent_configurations:
             for r in [range(20), reversed(range(20))]:
@@ -133,82 +187,105 @@ class UnitTests(TestCase):
                 for key in r:
                     expected_heap_length = len(heap) + 1
                     prior_key_in_heap = key in heap
-                    p3.perform_insertion(heap, key, config[0])
+                    pq1.perform_insertion(heap, key, config[0])
                     actual_heap_length = len(heap)
                     post_key_in_heap = key in heap
-                    self.assertTrue(p3.is_valid(heap, config[0]))
+                    self.assertTrue(pq1.is_valid(heap, config[0]))
                     self.assertEqual(expected_heap_length, actual_heap_length)
                     self.assertTrue(prior_key_in_heap or post_key_in_heap)
             heap = []
             for _ in range(100):
-                p3.perform_insertion(heap, random.randrange(-1000, 1000, 1), config[0])
-                self.assertTrue(p3.is_valid(heap, config[0]))
+                pq1.perform_insertion(heap, random.randrange(-1000, 1000, 1), config[0])
+                self.assertTrue(pq1.is_valid(heap, config[0]))
 
     def test_insert_efficiency(self):
         parent_configurations = [
-            [p3.perform_uniparental_ascending_swap_and_get_time, 'logarithmic'],
-            [p3.perform_biparental_ascending_swap_and_get_time, 'square root']
+            [1, 'logarithmic'],
+            [2, 'square root'],
+            [pq1.min_max_layout, 'logarithmic']
         ]
         for config in parent_configurations:
             for r in [range(20), reversed(range(20))]:
                 heap = []
                 for key in r:
-                    heap.append(key)
-                    time = config[0](heap, len(heap) - 1, 1)
-                    self.assertLessEqual(time, get_time_bound(heap, config[1]))
+                    with pq1.instrumentation() as probe:
+                        pq1.perform_insertion(heap, key, config[0])
+                    self.assertLessEqual(probe.steps, get_time_bound(heap, config[1]))
 
     def test_extract_correctness(self):
         parent_configurations = [
             [1, valid_uniparental_heaps],
-            [2, valid_biparental_heaps]
+            [2, valid_biparental_heaps],
+            [pq1.min_max_layout, valid_min_max_heaps]
         ]
         for config in parent_configurations:
-            actual_min_key = p3.perform_extraction_and_get_min([], config[0])
+            actual_min_key = pq1.perform_extraction_and_get_min([], config[0])
             self.assertEqual(None, actual_min_key)
             for heap in config[1]:
                 if heap:
                     expected_min_key = min(heap)
                     expected_heap_length = len(heap) - 1
-                    actual_min_key = p3.perform_extraction_and_get_min(heap, config[0])
+                    actual_min_key = pq1.perform_extraction_and_get_min(heap, config[0])
                     actual_heap_length = len(heap)
-                    self.assertTrue(p3.is_valid(heap, config[0]))
+                    self.assertTrue(pq1.is_valid(heap, config[0]))
                     self.assertEqual(expected_min_key, actual_min_key)
                     self.assertEqual(expected_heap_length, actual_heap_length)
             heap = []
             for n in [1, 2, 3, 4, 100]:
                 for _ in range(n):
-                    p3.perform_insertion(heap, random.randrange(-1000, 1000, 1), config[0])
+                    pq1.perform_insertion(heap, random.randrange(-1000, 1000, 1), config[0])
                 for _ in range(n):
                     expected_min = min(heap)
-                    min_ = p3.perform_extraction_and_get_min(heap, config[0])
+                    min_ = pq1.perform_extraction_and_get_min(heap, config[0])
                     self.assertEqual(min_, expected_min)
-                    self.assertTrue(p3.is_valid(heap, config[0]))
+                    self.assertTrue(pq1.is_valid(heap, config[0]))
+
+    def test_extract_max_correctness(self):
+        for parents in [1, 2, pq1.min_max_layout]:
+            self.assertIsNone(pq1.perform_extraction_and_get_max([], parents))
+            for n in [1, 2, 3, 4, 100]:
+                heap = [random.randrange(-1000, 1000, 1) for _ in range(n)]
+                pq1.perform_heapification(heap, parents)
+                for _ in range(n):
+                    expected_max = max(heap)
+                    self.assertEqual(expected_max, pq1.get_max(heap, parents))
+                    self.assertEqual(expected_max, pq1.perform_extraction_and_get_max(heap, parents))
+                    self.assertTrue(pq1.is_valid(heap, parents))
+
+    def test_extract_max_efficiency(self):
+        heap = []
+        for key in range(1000):
+            pq1.perform_insertion(heap, random.randrange(-1000, 1000, 1), pq1.min_max_layout)
+        while heap:
+            time_bound = get_time_bound(heap, 'logarithmic')
+            with pq1.instrumentation() as probe:
+                pq1.perform_extraction_and_get_max(heap, pq1.min_max_layout)
+            # the gap left by the maximum is filled by a key that may move both up and down
+            self.assertLessEqual(probe.steps, 2 * time_bound)
 
     def test_extract_efficiency(self):
         parent_configurations = [
-            [valid_uniparental_heaps, 'logarithmic', p3.perform_uniparental_descending_swap_and_get_time],
-            [valid_biparental_heaps, 'square root', p3.perform_biparental_descending_swap_and_get_time]
+            [valid_uniparental_heaps, 'logarithmic', 1],
+            [valid_biparental_heaps, 'square root', 2],
+            [valid_min_max_heaps, 'logarithmic', pq1.min_max_layout]
         ]
         for config in parent_configurations:
             for heap in config[0]:
                 time_bound = get_time_bound(heap, config[1])
-                if len(heap) == 1:
-                    heap.pop()
-                elif len(heap) > 1:
-                    heap[0], heap[-1] = heap[-1], heap[0]
-                    heap.pop(-1)
-                    time = config[2](heap, 0, 1)
-                    self.assertLessEqual(time, time_bound)
+                with pq1.instrumentation() as probe:
+                    pq1.perform_extraction_and_get_min(heap, config[2])
+                self.assertLessEqual(probe.steps, time_bound)
 
     def test_search_correctness(self):
         parent_configurations = [
             [valid_uniparental_heaps, 1],
-            [valid_biparental_heaps, 2]
+            [valid_biparental_heaps, 2],
+            [valid_min_max_heaps, pq1.min_max_layout]
         ]
         for config in parent_configurations:
             for heap in config[0]:
                 for key in range(30):
-                    index = p3.search_for_key_and_get_index(heap, key, config[1])
+                    index = pq1.search_for_key_and_get_index(heap, key, config[1])
                     if key not in heap:
                         self.assertIsNone(index)
                     else:
@@ -216,8 +293,8 @@ class UnitTests(TestCase):
 
     def test_search_efficiency(self):
         parent_configurations = [
-            [valid_uniparental_heaps, p3.uniparental_search_for_key_and_get_index_and_time, 'linear'],
-            [valid_biparental_heaps, p3.biparental_search_for_key_and_get_index_and_time, 'square root']
+            [valid_uniparental_heaps, pq1.uniparental_search_for_key_and_get_index_and_time, 'linear'],
+            [valid_biparental_heaps, pq1.biparental_search_for_key_and_get_index_and_time, 'square root']
         ]
         for config in parent_configurations:
             for heap in config[0]:
@@ -232,49 +309,867 @@ class UnitTests(TestCase):
     def test_is_valid_correctness(self):
         parent_configurations = [
             [1, valid_uniparental_heaps, invalid_uniparental_heaps],
-            [2, valid_biparental_heaps, invalid_biparental_heaps]
+            [2, valid_biparental_heaps, invalid_biparental_heaps],
+            [pq1.min_max_layout, valid_min_max_heaps, invalid_min_max_heaps]
         ]
         for config in parent_configurations:
             for heap in config[1]:
-                self.assertTrue(p3.is_valid(heap, config[0]))
+                self.assertTrue(pq1.is_valid(heap, config[0]))
             for heap in config[2]:
-                self.assertFalse(p3.is_valid(heap, config[0]))
+                self.assertFalse(pq1.is_valid(heap, config[0]))
+
+    def test_first_violation_correctness(self):
+        parent_configurations = [
+            [1, invalid_uniparental_heaps, [1, 1, 3, 7]],
+            [2, invalid_biparental_heaps, [1, 2, 3, 4, 1]],
+            [pq1.min_max_layout, invalid_min_max_heaps, [1, 3, 3, 4, 7]]
+        ]
+        for config in parent_configurations:
+            for heap, violation_index in zip(config[1], config[2]):
+                for storage in [list, lambda keys: array('q', keys), numpy.array]:
+                    self.assertEqual(violation_index, pq1.get_first_violation_index(storage(heap), config[0]))
+            for heap_size in [2, 3, 10, 100]:
+                heap = list(range(heap_size))
+                pq1.perform_heapification(heap, config[0])
+                for storage in [list, lambda keys: array('d', keys), numpy.array]:
+                    self.assertIsNone(pq1.get_first_violation_index(storage(heap), config[0]))
+                heap[-1] = -1
+                for storage in [list, lambda keys: array('d', keys), numpy.array]:
+                    self.assertEqual(heap_size - 1, pq1.get_first_violation_index(storage(heap), config[0]))
+
+    def test_is_valid_efficiency(self):
+        # the number of levels here would make a check that revisits shared descendants intractable
+        heap_size = 100000
+        for parents in [1, 2]:
+            self.assertTrue(pq1.is_valid(list(range(heap_size)), parents))
+            self.assertTrue(pq1.is_valid(numpy.arange(heap_size), parents))
 
     def test_get_biparental_level_correctness(self):
         for level in biparental_level_to_indices:
             for index in biparental_level_to_indices[level]:
-                self.assertEqual(level, p3.get_biparental_level(index))
+                self.assertEqual(level, pq1.get_biparental_level(index))
+        # levels beyond the precision of a float square root
+        for level in [10 ** 8 + 7, 10 ** 12 + 3, 10 ** 20 + 1]:
+            l_edge_index, r_edge_index = pq1.get_biparental_block_indices(level)
+            self.assertEqual(level - 1, pq1.get_biparental_level(l_edge_index - 1))
+            self.assertEqual(level, pq1.get_biparental_level(l_edge_index))
+            self.assertEqual(level, pq1.get_biparental_level(r_edge_index))
+            self.assertEqual(level + 1, pq1.get_biparental_level(r_edge_index + 1))
 
     def test_get_biparental_block_indices_correctness(self):
         for level in biparental_level_to_indices:
             l_edge_index = biparental_level_to_indices[level][0]
             r_edge_index = biparental_level_to_indices[level][-1]
-            self.assertEqual((l_edge_index, r_edge_index), p3.get_biparental_block_indices(level))
+            self.assertEqual((l_edge_index, r_edge_index), pq1.get_biparental_block_indices(level))
+
+    def test_large_heap_correctness(self):
+        # paths here are longer than the default recursion limit, so this fails for recursive routines
+        heap_size = 600000
+        for parents in [1, 2]:
+            heap = list(range(heap_size))  # sorted keys are valid under either layout
+            self.assertIsNone(pq1.search_for_key_and_get_index(heap, heap_size, parents))
+            self.assertIsNone(pq1.search_for_key_and_get_index(heap, -1, parents))
+            self.assertEqual(heap_size - 1, heap[pq1.search_for_key_and_get_index(heap, heap_size - 1, parents)])
+            pq1.perform_insertion(heap, -1, parents)
+            self.assertEqual(-1, pq1.get_min(heap))
+            self.assertEqual(-1, pq1.perform_extraction_and_get_min(heap, parents))
+            self.assertEqual(0, pq1.perform_extraction_and_get_min(heap, parents))
+            self.assertEqual(1, pq1.get_min(heap))
+
+    def test_instrumentation_correctness(self):
+        for parents in [1, 2]:
+            heap = []
+            for key in reversed(range(20)):
+                pq1.perform_insertion(heap, key, parents)
+            with pq1.instrumentation() as probe:
+                pq1.perform_insertion(heap, -1, parents)
+            # the new minimum is swapped all the way up to the root, once per step
+            self.assertGreater(probe.steps, 0)
+            self.assertEqual(probe.steps, probe.swaps)
+            self.assertLessEqual(probe.steps, probe.comparisons)
+            self.assertTrue(pq1.is_valid(heap, parents))
+            probe.reset()
+            with pq1.instrumentation(probe):
+                pq1.perform_insertion(heap, 100, parents)
+            self.assertEqual(0, probe.swaps)
+            self.assertEqual(1, probe.steps)
+        for heap_class in [pq1.UniparentalHeap, pq1.BiparentalHeap, pq1.MinMaxHeap]:
+            probe = pq1.Probe()
+            heap = heap_class(range(10), probe=probe)
+            self.assertLessEqual(probe.swaps, probe.steps)
+            self.assertLessEqual(probe.steps, 10 * get_time_bound(range(10), 'linear'))
+            steps = probe.steps
+            self.assertEqual(0, heap.extract_min())
+            self.assertGreater(probe.steps, steps)
+            # heaps constructed without a probe count nothing, even inside an instrumented block
+            heap = heap_class(range(10))
+            with pq1.instrumentation() as probe:
+                heap.insert(-1)
+                pq1.perform_insertion([], 0, heap.parents)
+            self.assertEqual(0, probe.swaps)
+        with self.assertRaises(ValueError):
+            pq1.perform_insertion([], 0, 3)
+
+    def test_key_update_correctness(self):
+        for parents in [1, 2, pq1.min_max_layout]:
+            keys = [random.randrange(-100, 100, 1) for _ in range(200)]
+            heap = list(keys)
+            pq1.perform_heapification(heap, parents)
+            self.assertFalse(pq1.perform_key_deletion(heap, 1000, parents))
+            self.assertFalse(pq1.perform_key_replacement(heap, 1000, 0, parents))
+            for _ in range(50):
+                key = random.choice(keys)
+                self.assertTrue(pq1.perform_key_deletion(heap, key, parents))
+                keys.remove(key)
+                self.assertTrue(pq1.is_valid(heap, parents))
+                self.assertEqual(sorted(keys), sorted(heap))
+                old_key, new_key = random.choice(keys), random.randrange(-100, 100, 1)
+                self.assertTrue(pq1.perform_key_replacement(heap, old_key, new_key, parents))
+                keys[keys.index(old_key)] = new_key
+                self.assertTrue(pq1.is_valid(heap, parents))
+                self.assertEqual(sorted(keys), sorted(heap))
+                old_key = random.choice(keys)
+                self.assertTrue(pq1.perform_key_decrease(heap, old_key, old_key - 10, parents))
+                keys[keys.index(old_key)] = old_key - 10
+                self.assertTrue(pq1.is_valid(heap, parents))
+                self.assertEqual(sorted(keys), sorted(heap))
+            with self.assertRaises(ValueError):
+                pq1.perform_key_decrease(heap, keys[0], keys[0] + 1, parents)
+        for heap_class in [pq1.UniparentalHeap, pq1.BiparentalHeap, pq1.MinMaxHeap]:
+            heap = heap_class(range(100), 'q')
+            self.assertTrue(heap.delete_key(0))
+            self.assertFalse(heap.delete_key(0))
+            self.assertTrue(heap.replace_key(99, -1))
+            self.assertTrue(heap.decrease_key(50, -2))
+            self.assertTrue(heap.is_valid())
+            self.assertEqual(-2, heap.extract_min())
+            self.assertEqual(-1, heap.extract_min())
+            self.assertEqual(98, heap.get_max())
+
+    def test_key_update_efficiency(self):
+        heap = list(range(1000))
+        while heap:
+            time_bound = get_time_bound(heap, 'square root')
+            with pq1.instrumentation() as probe:
+                pq1.perform_key_deletion(heap, random.choice(heap), 2)
+            # M,S: a search of at most 2 * sqrt(2 * n) steps, then a repair along one path
+            self.assertLessEqual(probe.steps, 4 * time_bound)
+
+    def test_indexed_heap_correctness(self):
+        heap = pq1.IndexedHeap()
+        keys = {}
+        for _ in range(2000):
+            operation = random.randrange(5)
+            if operation == 0 or not keys:
+                key = random.randrange(-1000, 1000, 1)
+                keys[heap.insert(key)] = key
+            elif operation == 1:
+                handle = random.choice(list(keys))
+                keys[handle] -= random.randrange(0, 100, 1)
+                heap.decrease_key(handle, keys[handle])
+            elif operation == 2:
+                handle = random.choice(list(keys))
+                keys[handle] += random.randrange(0, 100, 1)
+                heap.increase_key(handle, keys[handle])
+            elif operation == 3:
+                handle = random.choice(list(keys))
+                self.assertEqual(keys.pop(handle), heap.remove(handle))
+                self.assertFalse(heap.contains(handle))
+            else:
+                handle, key = heap.extract_min_item()
+                self.assertEqual(min(keys.values()), key)
+                self.assertEqual(keys.pop(handle), key)
+            self.assertTrue(heap.is_valid())
+            self.assertEqual(len(keys), len(heap))
+            for handle, key in keys.items():
+                self.assertIn(handle, heap)
+                self.assertEqual(key, heap.get_key(handle))
+        handle = heap.insert(0, 'vertex')
+        self.assertEqual('vertex', handle)
+        with self.assertRaises(KeyError):
+            heap.insert(1, 'vertex')
+        with self.assertRaises(ValueError):
+            heap.decrease_key(handle, 1)
+        with self.assertRaises(ValueError):
+            heap.increase_key(handle, -1)
+        # generated handles pass over the integers which the caller has supplied
+        heap = pq1.IndexedHeap()
+        self.assertEqual(0, heap.insert(5, handle=0))
+        self.assertEqual(2, heap.insert(4, handle=2))
+        self.assertEqual([1, 3, 4], [heap.insert(key) for key in [3, 2, 1]])
+        self.assertEqual(5, len(set(heap._handles)))
+        self.assertTrue(heap.is_valid())
+        self.assertEqual([(4, 1), (3, 2), (1, 3), (2, 4), (0, 5)], [heap.extract_min_item() for _ in range(5)])
+
+    def test_heapification_correctness(self):
+        for parents in [1, 2, pq1.min_max_layout]:
+            for heap_size in [0, 1, 2, 3, 10, 1000]:
+                keys = [random.randrange(-1000, 1000, 1) for _ in range(heap_size)]
+                for storage in [list, lambda keys_: array('q', keys_), numpy.array]:
+                    heap = storage(keys)
+                    pq1.perform_heapification(heap, parents)
+                    self.assertTrue(pq1.is_valid(heap, parents))
+                    self.assertEqual(sorted(keys), sorted(heap))
+                    heap = storage(keys)
+                    with pq1.instrumentation():
+                        pq1.perform_heapification(heap, parents)
+                    self.assertTrue(pq1.is_valid(heap, parents))
+                    self.assertEqual(sorted(keys), sorted(heap))
+
+    def test_heapification_efficiency(self):
+        heap_size = 1000
+        heap = [random.randrange(-1000, 1000, 1) for _ in range(heap_size)]
+        with pq1.instrumentation() as probe:
+            pq1.perform_heapification(heap, 1)
+        # Floyd: at most one step per level below each parent, which sums to fewer than n steps
+        self.assertLessEqual(probe.steps, get_time_bound(heap, 'linear'))
+
+    def test_heap_class_construction_correctness(self):
+        for heap_class in [pq1.UniparentalHeap, pq1.BiparentalHeap, pq1.MinMaxHeap]:
+            keys = [random.randrange(-1000, 1000, 1) for _ in range(1000)]
+            for heap in [heap_class.from_iterable(keys), heap_class.from_iterable(iter(keys), 'q'),
+                         heap_class.from_array(array('q', keys)), heap_class.from_array(numpy.array(keys)),
+                         heap_class.from_array(numpy.array(keys, dtype=numpy.float32))]:
+                self.assertTrue(heap.is_valid())
+                self.assertEqual(sorted(keys), sorted(heap))
+            # booleans have no array.array typecode, so they are kept in a list
+            heap = heap_class.from_array(numpy.array(keys) > 0)
+            self.assertTrue(heap.is_valid())
+            self.assertEqual(sorted(key > 0 for key in keys), sorted(heap))
+
+    def test_batch_correctness(self):
+        for parents in [1, 2, pq1.min_max_layout]:
+            for heap_size, batch_size in [(0, 10), (1000, 1), (1000, 10), (1000, 2000)]:
+                keys = [random.randrange(-1000, 1000, 1) for _ in range(heap_size)]
+                batch = [random.randrange(-1000, 1000, 1) for _ in range(batch_size)]
+                heap = list(keys)
+                pq1.perform_heapification(heap, parents)
+                pq1.perform_insertions(heap, batch, parents)
+                self.assertTrue(pq1.is_valid(heap, parents))
+                self.assertEqual(sorted(keys + batch), sorted(heap))
+                queries = batch[:50] + [1000, -1001]
+                indices = pq1.search_for_keys_and_get_indices(heap, queries, parents)
+                for key, index in zip(queries, indices):
+                    if key in heap:
+                        self.assertEqual(key, heap[index])
+                    else:
+                        self.assertIsNone(index)
+                for k in [0, 1, 5, len(heap) // 2, len(heap) + 1]:
+                    expected_mins = sorted(heap)[:k]
+                    self.assertEqual(expected_mins, pq1.perform_extractions_and_get_mins(heap, k, parents))
+                    self.assertTrue(pq1.is_valid(heap, parents))
+        for heap_class in [pq1.UniparentalHeap, pq1.BiparentalHeap, pq1.MinMaxHeap]:
+            keys = [random.randrange(-1000, 1000, 1) for _ in range(1000)]
+            heap = heap_class(keys[:100], 'q')
+            heap.insert_many(keys[100:110])
+            heap.insert_many(keys[110:])
+            self.assertTrue(heap.is_valid())
+            for key, index in zip(keys[:10], heap.search_many(keys[:10])):
+                self.assertEqual(key, list(heap)[index])
+            self.assertEqual(sorted(keys)[:10], heap.extract_k_smallest(10))
+            self.assertEqual(sorted(keys)[10:], heap.extract_k_smallest(len(keys)))
+            self.assertFalse(heap)
+
+    def test_heap_class_correctness(self):
+        for heap_class in [pq1.UniparentalHeap, pq1.BiparentalHeap, pq1.MinMaxHeap]:
+            for typecode in [None, 'q', 'd']:
+                keys = [random.randrange(-1000, 1000, 1) for _ in range(100)]
+                heap = heap_class(keys, typecode)
+                self.assertEqual(len(keys), len(heap))
+                self.assertTrue(heap)
+                self.assertTrue(heap.is_valid())
+                self.assertEqual(sorted(keys), sorted(heap))
+                self.assertEqual(min(keys), heap.get_min())
+                self.assertEqual(max(keys), heap.get_max())
+                for key in keys[:10] + [1000]:
+                    index = heap.search(key)
+                    if key in keys:
+                        self.assertEqual(key, list(heap)[index])
+                    else:
+                        self.assertIsNone(index)
+                extracted = []
+                while heap:
+                    extracted.append(heap.extract_min())
+                    self.assertTrue(heap.is_valid())
+                    if heap:
+                        extracted.append(heap.extract_max())
+                        self.assertTrue(heap.is_valid())
+                self.assertEqual(sorted(keys), sorted(extracted))
+                self.assertEqual(sorted(keys)[:50], extracted[0::2])
+                self.assertEqual(sorted(keys)[50:][::-1], extracted[1::2])
+                self.assertIsNone(heap.extract_min())
+                self.assertIsNone(heap.extract_max())
+                self.assertIsNone(heap.get_min())
+                self.assertIsNone(heap.get_max())
+
+    def test_payload_heap_correctness(self):
+        for heap_class in [pq1.UniparentalPayloadHeap, pq1.BiparentalPayloadHeap]:
+            # dictionaries are unorderable, so a tie on priority must never fall through to the payloads
+            payloads = [{'priority': random.randrange(0, 10, 1)} for _ in range(300)]
+            heap = heap_class(payloads[:200], key=lambda payload: payload['priority'])
+            self.assertTrue(heap.is_valid())
+            for payload in payloads[200:]:
+                heap.insert(payload)
+            self.assertTrue(heap.is_valid())
+            self.assertEqual(300, len(heap))
+            self.assertEqual(9, heap.get_max_item()[0])
+            self.assertEqual(9, heap.extract_max()['priority'])
+            previous_priority = -1
+            while heap:
+                priority, payload = heap.extract_min_item()
+                self.assertEqual(priority, payload['priority'])
+                self.assertLessEqual(previous_priority, priority)
+                previous_priority = priority
+            self.assertIsNone(heap.extract_min())
+            self.assertIsNone(heap.get_max())
+            heap = heap_class('abc', [3, 1, 2], typecode='q')
+            heap.insert('z', 0)
+            self.assertEqual(('z', 'b', 'c', 'a'), tuple(heap.extract_min() for _ in range(4)))
+            heap = heap_class('abc', ['c', 'a', 'b'], typecode=None)
+            self.assertEqual('b', heap.get_min())
+            with self.assertRaises(TypeError):
+                heap.insert('d')
+            with self.assertRaises(ValueError):
+                heap_class('ab', [1])
+        with self.assertRaises(ValueError):
+            type('MinMaxPayloadHeap', (pq1.PayloadHeap,), {'parents': pq1.min_max_layout})((), ())
+
+    def test_concurrent_heap_correctness(self):
+        for parents in [1, 2, pq1.min_max_layout]:
+            heap = pq_concurrent.ConcurrentHeap(maxsize=100, parents=parents)
+            keys = [random.randrange(0, 1000, 1) for _ in range(4000)]
+            results = []
+
+            def produce(first_index):
+                for index in range(first_index, len(keys), 8):
+                    heap.put(keys[index])
+
+            def consume():
+                while True:
+                    batch = heap.get_many(10, timeout=1)
+                    self.assertEqual(sorted(batch), batch)
+                    for _ in batch:
+                        heap.task_done()
+                    results.extend(batch)
+                    if len(results) >= len(keys):
+                        return
+
+            threads = [threading.Thread(target=produce, args=(first_index,)) for first_index in range(4)]
+            # the other half of the keys arrive in batches, each inserted under one acquisition of the lock
+            batch = [keys[index] for first_index in range(4, len(keys), 8)
+                     for index in range(first_index, first_index + 4)]
+            threads.append(threading.Thread(target=heap.put_many, args=(batch,)))
+            threads.append(threading.Thread(target=consume))
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(10)
+            heap.join()
+            self.assertEqual(sorted(keys), sorted(results))
+            with self.assertRaises(queue.Empty):
+                heap.get(timeout=0.01)
+            with self.assertRaises(queue.Empty):
+                heap.get_many(10, block=False)
+            heap.put_many(range(100))
+            self.assertTrue(heap.full())
+            with self.assertRaises(queue.Full):
+                heap.put(-1, timeout=0.01)
+            with self.assertRaises(queue.Full):
+                heap.put_many([-1], block=False)
+            self.assertTrue(heap.contains(50))
+            self.assertTrue(heap.remove(50))
+            self.assertFalse(heap.remove(50))
+            heap.put(-1, block=False)
+            self.assertEqual([-1, 0, 1], heap.get_many(3))
+        # a batch which does not fit, without blocking or within its timeout, inserts nothing
+        heap = pq_concurrent.ConcurrentHeap(maxsize=3)
+        with self.assertRaises(queue.Full):
+            heap.put_many([5, 6, 7, 8, 9], block=False)
+        self.assertEqual((0, 0), (heap.qsize(), heap.unfinished_tasks))
+        heap.put_many([5, 6], block=False)
+        with self.assertRaises(queue.Full):
+            heap.put_many([7, 8], timeout=0.01)
+        self.assertEqual((2, 2), (heap.qsize(), heap.unfinished_tasks))
+        threading.Timer(0.05, heap.get).start()
+        heap.put_many([7, 8], timeout=10)
+        self.assertEqual([6, 7, 8], heap.get_many(3))
+        with self.assertRaises(ValueError):
+            pq_concurrent.ConcurrentHeap(parents=3)
+
+    def test_async_heap_correctness(self):
+        async def exchange(parents):
+            heap = pq_concurrent.AsyncHeap(maxsize=10, parents=parents)
+            keys = [random.randrange(0, 1000, 1) for _ in range(200)]
+
+            async def produce():
+                for key in keys:
+                    await heap.put(key)
+            producer = asyncio.ensure_future(produce())
+            results = []
+            while len(results) < len(keys):
+                results.append(await heap.get())
+                heap.task_done()
+            await producer
+            await heap.join()
+            self.assertEqual(sorted(keys), sorted(results))
+            for key in [3, 1, 2]:
+                heap.put_nowait(key)
+            self.assertTrue(heap.contains(2))
+            self.assertTrue(heap.remove(2))
+            self.assertFalse(heap.contains(2))
+            self.assertEqual([1, 3], [heap.get_nowait(), heap.get_nowait()])
+            for _ in range(2):
+                heap.task_done()
+            await asyncio.wait_for(heap.join(), 1)
+
+        for parents in [1, 2]:
+            asyncio.run(exchange(parents))
+
+    def test_sharded_heap_correctness(self):
+        for parents in [1, 2, pq1.min_max_layout]:
+            for routing in ['round-robin', 'hash']:
+                with pq_sharded.ShardedHeap(4, 1000, parents, 'q', routing) as heap:
+                    keys = [random.randrange(-1000, 1000, 1) for _ in range(2000)]
+                    for key in keys[:500]:
+                        heap.insert(key)
+                    heap.insert_many(keys[500:])
+                    self.assertEqual(len(keys), len(heap))
+                    self.assertTrue(heap.is_valid())
+                    self.assertEqual(min(keys), heap.get_min())
+                    mins = heap.extract_k_smallest(100) + [heap.extract_min() for _ in range(900)]
+                    self.assertEqual(sorted(keys)[:1000], mins)
+                    approximate_mins = [heap.extract_min(k=2) for _ in range(1000)]
+                    self.assertEqual(sorted(keys)[1000:], sorted(approximate_mins))
+                    self.assertIsNone(heap.extract_min(k=2))
+                    self.assertIsNone(heap.get_min())
+        with pq_sharded.ShardedHeap(2, 10, routing='hash') as heap:
+            with self.assertRaises(queue.Full):
+                heap.insert_many([0.0] * 11)
+            # a batch which does not fit inserts nothing, even into the shards which had room for their keys
+            with self.assertRaises(queue.Full):
+                heap.insert_many([0, 2] + [1] * 11)
+            self.assertEqual(0, len(heap))
+        with pq_sharded.ShardedHeap(2, 10) as heap:
+            heap.insert_many(range(15))
+            with self.assertRaises(queue.Full):
+                heap.insert_many(range(6))
+            self.assertEqual(15, len(heap))
+            # the 5 keys cannot alternate between shards with 2 and 3 free slots, so some pass on to the next shard
+            heap.insert_many(range(15, 20))
+            self.assertEqual(list(range(20)), heap.extract_k_smallest(20))
+        with self.assertRaises(ValueError):
+            pq_sharded.ShardedHeap(routing='random')
+
+    def test_sharded_heap_processes(self):
+        context = multiprocessing.get_context('spawn')
+        with pq_sharded.ShardedHeap(4, 10000, 2, context='spawn') as heap:
+            keys = [[random.random() for _ in range(1000)] for _ in range(2)]
+            processes = [context.Process(target=insert_into_shards, args=(heap, process_keys))
+                         for process_keys in keys]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+            self.assertTrue(heap.is_valid())
+            self.assertEqual(sorted(keys[0] + keys[1]), heap.extract_k_smallest(2000))
+
+    def test_mapped_heap_correctness(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'queue')
+            for parents in [1, 2, pq1.min_max_layout]:
+                keys = [random.randrange(-1000, 1000, 1) for _ in range(3000)]
+                with pq_mmap.MappedHeap(path, parents, 'q', capacity=4) as heap:
+                    for key in keys[:1000]:
+                        heap.insert(key)
+                    heap.insert_many(keys[1000:1010])
+                    heap.insert_many(keys[1010:])
+                    self.assertEqual(len(keys), len(heap))
+                    self.assertGreaterEqual(heap.capacity, len(keys))
+                    self.assertTrue(heap.is_valid())
+                    self.assertEqual(max(keys), heap.extract_max())
+                    keys.remove(max(keys))
+                    heap.snapshot()
+                with pq_mmap.MappedHeap.open(path) as heap:
+                    self.assertEqual((parents, 'q', len(keys)), (heap.parents, heap.typecode, len(heap)))
+                    self.assertIsNotNone(heap.search(keys[0]))
+                    self.assertEqual(min(keys), heap.get_min())
+                    self.assertEqual(sorted(keys), [heap.extract_min() for _ in range(len(keys))])
+                    self.assertIsNone(heap.extract_min())
+            for size in [0, 10, 100]:
+                with open(path, 'wb') as file:
+                    file.write(bytes(size))
+                with self.assertRaises(ValueError):
+                    pq_mmap.MappedHeap.open(path)
+            # as is a header with an unknown layout or typecode
+            for layout, typecode in [(0, 'q'), (9, 'q'), (1, 'u'), (1, 'x')]:
+                with open(path, 'wb') as file:
+                    file.write(struct.pack(pq_mmap.header_format, pq_mmap.magic, layout, ord(typecode), 0, 4))
+                    file.truncate(pq_mmap.header_size + 32)
+                with self.assertRaises(ValueError):
+                    pq_mmap.MappedHeap.open(path)
+
+    def test_mapped_heap_page_faults(self):
+        # pages touched by the sifts of a freshly mapped file, over a heap of 8 MB: each first touch is a fault
+        if resource is None:
+            self.skipTest('getrusage is unavailable')
+        heap_size = 1000000
+        faults_per_operation = {}
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'queue')
+            for parents in [1, 2]:
+                with pq_mmap.MappedHeap(path, parents, 'd', heap_size) as heap:
+                    heap.insert_many(random.random() for _ in range(heap_size))
+                for operation in ['insert', 'extract']:
+                    with pq_mmap.MappedHeap.open(path) as heap:
+                        usage = resource.getrusage(resource.RUSAGE_SELF)
+                        for _ in range(100):
+                            if operation == 'insert':
+                                heap.insert(random.random())
+                            else:
+                                heap.extract_min()
+                        faults = resource.getrusage(resource.RUSAGE_SELF).ru_minflt - usage.ru_minflt
+                    faults_per_operation[parents, operation] = faults / 100
+                    print('parents {}, {}: {:.1f} page faults per operation'.format(parents, operation, faults / 100))
+        # a beap's sift crosses O(sqrt(n)) levels on as many pages, a heap's O(log(n)) levels on few, mostly resident
+        for operation in ['insert', 'extract']:
+            self.assertGreater(faults_per_operation[2, operation], faults_per_operation[1, operation])
+        self.assertLessEqual(faults_per_operation[1, 'insert'], math.log(heap_size, 2))
+
+    def test_merge_correctness(self):
+        for parents in [1, 2, pq1.min_max_layout]:
+            for heap_size, other_size in [(0, 0), (0, 10), (10, 0), (1000, 10), (10, 1000), (500, 500)]:
+                heap = [random.randrange(-100, 100, 1) for _ in range(heap_size)]
+                other = [random.randrange(-100, 100, 1) for _ in range(other_size)]
+                keys = heap + other
+                pq1.perform_heapification(heap, parents)
+                pq1.perform_heapification(other, parents)
+                pq1.perform_merge(heap, other, parents)
+                self.assertTrue(pq1.is_valid(heap, parents))
+                self.assertEqual(sorted(keys), sorted(heap))
+            runs = [sorted(random.randrange(-100, 100, 1) for _ in range(run_size)) for run_size in [0, 1, 50, 300]]
+            heap = pq1.get_heap_from_sorted_runs(runs, parents)
+            self.assertTrue(pq1.is_valid(heap, parents))
+            self.assertEqual(sorted(sum(runs, [])), sorted(heap))
+        for heap_class in [pq1.UniparentalHeap, pq1.BiparentalHeap, pq1.MinMaxHeap]:
+            heap = heap_class(range(10), 'q')
+            heap.merge(heap_class(range(100, 0, -1), 'q'))
+            heap.merge(range(-5, 0))
+            heap.merge(pq1.UniparentalHeap(range(200, 210)) if heap_class is not pq1.UniparentalHeap else [])
+            self.assertTrue(heap.is_valid())
+            self.assertEqual(-5, heap.get_min())
+            self.assertEqual(sorted(heap), [heap.extract_min() for _ in range(len(heap))])
+        for parents, arity in [(3, 2), (2, 3)]:
+            with self.assertRaises(ValueError):
+                pq1.get_heap_from_sorted_runs([[1, 2]], parents, arity)
+
+    def test_range_correctness(self):
+        for heap_size in [0, 1, 2, 3, 10, 100, 1000]:
+            beap = []
+            for _ in range(heap_size):
+                pq1.perform_insertion(beap, random.randrange(0, 50, 1), 2)
+            for _ in range(heap_size // 3):
+                pq1.perform_extraction_and_get_min(beap, 2)
+            for keys in [beap, array('q', beap), numpy.array(beap, dtype=numpy.int64)]:
+                for key in range(-1, 52):
+                    self.assertEqual(sum(1 for beap_key in beap if beap_key < key), pq1.count_less_than(keys, key))
+                    self.assertEqual(sum(1 for beap_key in beap if beap_key <= key), pq1.rank(keys, key))
+                for low_key, high_key in [(10, 20), (0, 0), (30, 10), (-5, 100)]:
+                    self.assertEqual(sorted(beap_key for beap_key in beap if low_key <= beap_key <= high_key),
+                                     sorted(pq1.iter_range(keys, low_key, high_key)))
+        heap = pq1.BiparentalHeap(reversed(range(100)), 'd')
+        self.assertEqual(25, heap.count_less_than(25))
+        self.assertEqual(26, heap.rank(25))
+        self.assertEqual(list(range(10, 20)), sorted(heap.iter_range(10, 19)))
+        # keys come row by row of the triangular matrix, whose row i holds the ith key of each level from level i on
+        for beap in [list(range(10)), array('q', range(10))]:
+            self.assertEqual([0, 1, 3, 6, 2, 4, 7, 5, 8, 9], list(pq1.iter_range(beap, 0, 9)))
+
+    def test_lazy_heap_correctness(self):
+        for parents in [1, 2, pq1.min_max_layout]:
+            heap = pq1.LazyHeap(parents=parents, compaction_ratio=0.3)
+            keys = []
+            for _ in range(3000):
+                operation, key = random.random(), random.randrange(0, 100, 1)
+                if operation < 0.5:
+                    heap.insert(key)
+                    keys.append(key)
+                elif operation < 0.75:
+                    self.assertEqual(key in keys, heap.cancel(key))
+                    if key in keys:
+                        keys.remove(key)
+                        self.assertLessEqual(heap.tombstones, 0.3 * (len(heap) + heap.tombstones))
+                elif operation < 0.9:
+                    self.assertEqual(min(keys, default=None), heap.get_min())
+                    key = heap.extract_min()
+                    if key is not None:
+                        keys.remove(key)
+                else:
+                    self.assertEqual(max(keys, default=None), heap.get_max())
+                    key = heap.extract_max()
+                    if key is not None:
+                        keys.remove(key)
+                self.assertEqual(len(keys), len(heap))
+                self.assertTrue(heap.is_valid())
+            self.assertGreater(len(heap.compaction_times), 0)
+            heap.compact()
+            self.assertEqual(0, heap.tombstones)
+            self.assertEqual(sorted(keys), [heap.extract_min() for _ in range(len(keys))])
+            self.assertFalse(heap)
+
+    def test_lazy_heap_counts_correctness(self):
+        # the counts of keys which are no longer in the heap are dropped, rather than kept at 0
+        for parents in [1, 2, pq1.min_max_layout]:
+            heap = pq1.LazyHeap(parents=parents, compaction_ratio=0.9)
+            for i in range(1000):
+                heap.insert((i, i))
+            for i in range(0, 1000, 4):
+                heap.cancel((i, i))
+            for _ in range(400):
+                heap.extract_min()
+            for _ in range(300):
+                heap.extract_max()
+            self.assertEqual(len(heap), len(heap._live))
+            self.assertEqual(heap.tombstones, sum(heap._dead.values()))
+            self.assertNotIn(0, heap._live.values())
+            self.assertNotIn(0, heap._dead.values())
+            while heap:
+                heap.extract_min()
+            heap.compact()
+            self.assertEqual(0, len(heap._live))
+            self.assertEqual(0, len(heap._dead))
+
+    def test_lazy_heap_performance(self):
+        # cancelling a third of the keys, then extracting the rest: lazily, or with a search and repair per cancel
+        for parents in [1, 2]:
+            keys = random.sample(range(100000), 20000)
+            cancelled_keys = keys[::3]
+            lazy_heap = pq1.LazyHeap(keys, parents, compaction_ratio=0.25)
+            start = perf_counter()
+            for key in cancelled_keys:
+                lazy_heap.cancel(key)
+            while lazy_heap:
+                lazy_heap.extract_min()
+            lazy_seconds = perf_counter() - start
+            heap = list(keys)
+            pq1.perform_heapification(heap, parents)
+            start = perf_counter()
+            for key in cancelled_keys:
+                pq1.perform_key_deletion(heap, key, parents)
+            while heap:
+                pq1.perform_extraction_and_get_min(heap, parents)
+            print('parents {}: lazy {:.3f}s, of which {} compactions took {:.4f}s; eager {:.3f}s'.format(
+                parents, lazy_seconds, len(lazy_heap.compaction_times), sum(lazy_heap.compaction_times),
+                perf_counter() - start))
+            # the same workloads, counted in steps: a cancel takes none, where a deletion searches and then sifts
+            with pq1.instrumentation() as probe:
+                lazy_heap = pq1.LazyHeap(keys, parents, compaction_ratio=0.25)
+                build_steps = probe.steps
+                for key in cancelled_keys:
+                    lazy_heap.cancel(key)
+                while lazy_heap:
+                    lazy_heap.extract_min()
+                lazy_steps = probe.steps - build_steps
+            heap = list(keys)
+            pq1.perform_heapification(heap, parents)
+            with pq1.instrumentation() as probe:
+                for key in cancelled_keys:
+                    pq1.perform_key_deletion(heap, key, parents)
+                while heap:
+                    pq1.perform_extraction_and_get_min(heap, parents)
+            self.assertLess(lazy_steps, probe.steps)
+
+    def test_benchmark_correctness(self):
+        rows = pq_bench.run_benchmarks([10, 100], calls=20, repetitions=2)
+        self.assertEqual(len(pq_bench.complexity_classes) * len(pq_bench.distributions) * 2 * 4, len(rows))
+        for row in rows:
+            self.assertGreater(row['ns_per_op'], 0)
+            self.assertLessEqual(row['best_ns_per_op'], row['ns_per_op'])
+        self.assertEqual([], pq_bench.check_bounds([10, 100, 1000], calls=20))
+        with tempfile.TemporaryDirectory() as directory:
+            for extension in ['.json', '.csv']:
+                path = os.path.join(directory, 'results' + extension)
+                pq_bench.write_rows(rows, path)
+                baseline_rows = pq_bench.read_rows(path)
+                self.assertEqual([], pq_bench.get_regressions(rows, baseline_rows, 1.0))
+                for row in baseline_rows:
+                    row['ns_per_op'] = float(row['ns_per_op']) / 2
+                self.assertEqual(len(rows), len(pq_bench.get_regressions(rows, baseline_rows, 1.5)))
+            self.assertEqual(0, pq_bench.main(['--sizes', '10', '--layouts', '2', 'heapq', '--operations', '10',
+                                               '--repetitions', '1', '--check-bounds', '--output', path]))
+
+    def test_trace_correctness(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'trace.jsonl')
+            with pq_trace.TraceRecorder(pq1.BiparentalHeap(), path) as heap:
+                mins = []
+                for _ in range(2000):
+                    operation = random.random()
+                    if operation < 0.5:
+                        heap.insert(random.randrange(0, 1000, 1))
+                    elif operation < 0.7:
+                        mins.append(heap.extract_min())
+                    elif operation < 0.8:
+                        heap.search(random.randrange(0, 1000, 1))
+                    elif operation < 0.9:
+                        heap.delete_key(random.randrange(0, 1000, 1))
+                    else:
+                        heap.get_max()
+                self.assertTrue(heap.is_valid())
+                # batches are recorded key by key, and keys which are replaced are recorded with their new keys
+                heap.insert_many([5, 3, 1])
+                heap.merge(pq1.BiparentalHeap([7, 2]))
+                heap.merge(iter([9, 4]))
+                mins += heap.extract_k_smallest(3)
+                heap.replace_key(9, 8)
+                heap.decrease_key(8, 6)
+                with self.assertRaises(ValueError):
+                    heap.decrease_key(6, 10)
+                with self.assertRaises(AttributeError):
+                    heap.from_iterable([1])
+                remaining_keys = sorted(heap.heap)
+            records = pq_trace.read_trace(path)
+            self.assertEqual(2012, len(records))
+            self.assertEqual([('replace_key', (9, 8)), ('decrease_key', (8, 6))], records[-2:])
+            for parents in [1, 2, pq1.min_max_layout]:
+                latencies = pq_trace.replay(records, parents)
+                self.assertEqual(2012, sum(len(operation_latencies) for operation_latencies in latencies.values()))
+                report = pq_trace.get_report(latencies)
+                self.assertEqual(len(mins), report['extract_min']['count'])
+                for row in report.values():
+                    self.assertLessEqual(row['p50'], row['p99'])
+                    self.assertLessEqual(row['p99'], row['p999'])
+            # a replay drives the heap through the same states as the recorded run
+            heap = pq1.MinMaxHeap()
+            for operation, key in records:
+                if key is None:
+                    getattr(heap, operation)()
+                elif operation in pq_trace.replacing_operations:
+                    getattr(heap, operation)(*key)
+                else:
+                    getattr(heap, operation)(key)
+            self.assertEqual(remaining_keys, sorted(heap))
+            self.assertEqual(0, pq_trace.main([path, '--layouts', '2']))
+            with open(path, 'a') as file:
+                file.write('{"op": "merge"}\n')
+            with self.assertRaises(ValueError):
+                pq_trace.read_trace(path)
+        self.assertEqual(1, pq_trace.get_percentile([1, 2, 3, 4], 0.25))
+        self.assertEqual(4, pq_trace.get_percentile([1, 2, 3, 4], 0.999))
+
+    def test_memory_regression(self):
+        # no hot operation allocates more than a few small objects, whatever the size of the heap
+        rows = pq_memory.get_profiles([10000], calls=200)
+        self.assertEqual(len(pq_memory.layouts) * len(pq_memory.backends), len(rows))
+        for row in rows:
+            for operation, operation_profile in row['operations'].items():
+                message = '{} {} {}'.format(row['layout'], row['backend'], operation)
+                self.assertLessEqual(operation_profile['peak_bytes'], 1024, message)
+                self.assertLess(operation_profile['retained_blocks_per_op'], 0.5, message)
+            # a list holds a pointer to each key object, and an array.array the keys themselves
+            if row['backend'] == 'array':
+                self.assertLess(row['bytes_per_key'], 10)
+            else:
+                self.assertGreater(row['bytes_per_key'], 30)
+        # a copy of the heap on each call is caught
+        class CopyingHeap(pq1.UniparentalHeap):
+            def get_min(self):
+                return self._keys[:][0]
+
+        profile = pq_memory.profile_operations(CopyingHeap(range(10000)), 10)
+        self.assertGreater(profile['get_min']['peak_bytes'], 10000)
+        self.assertEqual(0, pq_memory.main(['--sizes', '100', '--layouts', '2', '--calls', '10']))
+
+    def test_arity_correctness(self):
+        for arity in [2, 3, 4, 8]:
+            for heap_size in [0, 1, 2, 7, 100, 1000]:
+                keys = [random.randrange(-100, 100, 1) for _ in range(heap_size)]
+                heap = list(keys)
+                pq1.perform_heapification(heap, 1, arity)
+                self.assertTrue(pq1.is_valid(heap, 1, arity))
+                self.assertTrue(pq1.is_valid(numpy.array(heap), 1, arity))
+                pq1.perform_insertions(heap, [random.randrange(-100, 100, 1) for _ in range(10)], 1, arity)
+                self.assertTrue(pq1.is_valid(heap, 1, arity))
+                self.assertEqual(max(heap), pq1.get_max(heap, 1, arity))
+                mins = [pq1.perform_extraction_and_get_min(heap, 1, arity) for _ in range(len(heap))]
+                self.assertEqual(sorted(mins), mins)
+            heap = list(range(100))
+            heap[-1] = -1
+            self.assertEqual(99, pq1.get_first_violation_index(heap, 1, arity))
+            self.assertEqual(99, pq1.get_first_violation_index(numpy.array(heap), 1, arity))
+            heap = pq1.UniparentalHeap(reversed(range(100)), 'q', arity=arity)
+            self.assertTrue(heap.is_valid())
+            heap.insert(-1)
+            self.assertEqual(-1, heap.extract_min())
+            self.assertEqual(99, heap.extract_max())
+            self.assertEqual(list(range(98)), [heap.extract_min() for _ in range(98)])
+        with pq1.instrumentation() as probe:
+            heap = list(reversed(range(100)))
+            pq1.perform_heapification(heap, 1, 4)
+        self.assertTrue(pq1.is_valid(heap, 1, 4))
+        self.assertGreater(probe.steps, 0)
+        for parents, arity in [(2, 4), (pq1.min_max_layout, 4), (1, 1), (1, 2.5)]:
+            with self.assertRaises(ValueError):
+                pq1.get_routines(parents, arity=arity)
+
+    def test_arity_performance(self):
+        # wall-clock time of the plain routines: inserting a heap's worth of keys, then extracting them all
+        for heap_size in [1000, 10000, 100000]:
+            keys = [random.random() for _ in range(heap_size)]
+            insert_seconds, extract_seconds = {}, {}
+            for arity in [2, 3, 4, 8, 16]:
+                heap = []
+                start = perf_counter()
+                for key in keys:
+                    pq1.perform_insertion(heap, key, 1, arity)
+                middle = perf_counter()
+                for _ in range(heap_size):
+                    pq1.perform_extraction_and_get_min(heap, 1, arity)
+                insert_seconds[arity], extract_seconds[arity] = middle - start, perf_counter() - middle
+            for operation, seconds in [('insert', insert_seconds), ('extract', extract_seconds)]:
+                print('heap size {}, {}: {}; fastest arity {}'.format(
+                    heap_size, operation, ', '.join('{}: {:.3f}s'.format(arity, t) for arity, t in seconds.items()),
+                    min(seconds, key=seconds.get)))
+        # counted by the probe instead: a wider heap is shallower, so its sifts swap fewer times, but each level of an
+        # extraction compares more children
+        keys = [random.random() for _ in range(10000)]
+        insert_probes, extract_probes = {}, {}
+        for arity in [2, 4, 16]:
+            heap = []
+            with pq1.instrumentation() as insert_probes[arity]:
+                for key in keys:
+                    pq1.perform_insertion(heap, key, 1, arity)
+            with pq1.instrumentation() as extract_probes[arity]:
+                for _ in keys:
+                    pq1.perform_extraction_and_get_min(heap, 1, arity)
+        for probes in [insert_probes, extract_probes]:
+            self.assertGreater(probes[2].swaps, probes[4].swaps)
+            self.assertGreater(probes[4].swaps, probes[16].swaps)
+        self.assertLess(extract_probes[2].comparisons, extract_probes[16].comparisons)
 
     def test_plot_performance(self):
         parent_configuration = [
             {
                 'parents': 1,
                 'heap type': 'Uniparental Binary Heap',
-                'insert function': p3.perform_uniparental_ascending_swap_and_get_time,
+                'insert function': pq1.perform_uniparental_ascending_swap_and_get_time,
                 'insert bound': 'logarithmic',
-                'search function': p3.uniparental_search_for_key_and_get_index_and_time,
+                'search function': pq1.uniparental_search_for_key_and_get_index_and_time,
                 'search bound': 'linear',
-                'max function': p3.get_uniparental_max_and_time,
+                'max function': pq1.get_uniparental_max_and_time,
                 'max bound': 'linear',
-                'extract function': p3.perform_uniparental_descending_swap_and_get_time,
+                'extract function': pq1.perform_uniparental_descending_swap_and_get_time,
                 'extract bound': 'logarithmic'
             },
             {
                 'parents': 2,
                 'heap type': 'Biparental Binary Heap',
-                'insert function': p3.perform_biparental_ascending_swap_and_get_time,
+                'insert function': pq1.perform_biparental_ascending_swap_and_get_time,
                 'insert bound': 'square root',
-                'search function': p3.biparental_search_for_key_and_get_index_and_time,
+                'search function': pq1.biparental_search_for_key_and_get_index_and_time,
                 'search bound': 'square root',
-                'max function': p3.get_biparental_max_and_time,
+                'max function': pq1.get_biparental_max_and_time,
                 'max bound': 'square root',
-                'extract function': p3.perform_biparental_descending_swap_and_get_time,
+                'extract function': pq1.perform_biparental_descending_swap_and_get_time,
                 'extract bound': 'square root'
             }
         ]
@@ -308,8 +1203,9 @@ class UnitTests(TestCase):
             # max
             max_data[0] = config['max bound']
             for n in range(heap_size):
-                max_time_bound = get_time_bound(heap[:n], config['max bound'])
-                _, time = config['max function'](heap[:n])
+                # the first n keys are themselves a heap, which is measured in place rather than copied
+                max_time_bound = get_time_bound(range(n), config['max bound'])
+                _, time = config['max function'](heap, size=n)
                 self.assertLessEqual(time, max_time_bound)
                 max_data[1].append(time)
                 max_data[2].append(max_time_bound)
@@ -348,4 +1244,5 @@ def plot_data(heap_type, heap_size, insert_data, search_data, max_data, extract_
     fig.suptitle(heap_type)
     plt.subplots_adjust(top=0.9)
     plt.savefig(heap_type.replace(' ', '_') + '.png')
-    plt.show()
+    # saved rather than shown, so that the tests never wait on a window
+    plt.close(fig)
@@ -0,0 +1,237 @@
+"""
+Kyle Maclean
+Benchmarks for Priority Queues
+October 2026
+
+Usage: python pq_bench.py [--sizes 1000 10000 ...] [--distributions random sorted reversed duplicates]
+                          [--layouts 1 2 min-max heapq] [--operations 1000] [--repetitions 5]
+                          [--output results.json|results.csv] [--baseline previous.json] [--threshold 1.2]
+                          [--check-bounds]
+
+Wall-clock latency of the functional API of pq1, with the standard library's heapq as a baseline, headless. For each
+layout, distribution of keys and size, a heap of that size is built (untimed) and then each operation is timed over a
+batch of calls: insert, extract (min), search (for a key which is present) and max. An operation which takes linear
+time on a layout is called fewer times on larger heaps, so that each batch touches about as many keys as 1000 calls on
+a heap of 1000 keys. Each batch is repeated on a fresh copy of the heap, and the median is reported in ns/op and ops/s.
+
+Results are written as JSON or CSV according to the output's extension, and a baseline written by an earlier run can be
+given to fail (with exit status 1) on any operation which has become slower than threshold times its baseline.
+--check-bounds additionally counts steps with pq1's instrumentation, and fails on any operation whose mean number of
+steps exceeds a multiple of its complexity bound, as the efficiency tests of pq2 do.
+"""
+import argparse
+import csv
+import heapq
+import json
+import math
+import random
+import statistics
+import sys
+from time import perf_counter_ns
+
+import pq1
+
+distributions = ['random', 'sorted', 'reversed', 'duplicates']
+operations = ['insert', 'extract', 'search', 'max']
+complexity_classes = {
+    '1': {'insert': 'logarithmic', 'extract': 'logarithmic', 'search': 'linear', 'max': 'linear'},
+    '2': {'insert': 'square root', 'extract': 'square root', 'search': 'square root', 'max': 'square root'},
+    pq1.min_max_layout: {'insert': 'logarithmic', 'extract': 'logarithmic', 'search': 'linear', 'max': 'constant'},
+    'heapq': {'insert': 'logarithmic', 'extract': 'logarithmic', 'search': 'linear', 'max': 'linear'}
+}
+bound_factor = 4  # how many times its complexity bound an operation's mean number of steps may be
+fields = ['layout', 'distribution', 'size', 'operation', 'calls', 'repetitions', 'ns_per_op', 'best_ns_per_op',
+          'ops_per_s']
+
+
+def get_keys(distribution, size, rng):
+    if distribution == 'random':
+        return [rng.random() for _ in range(size)]
+    elif distribution == 'sorted':
+        return [float(key) for key in range(size)]
+    elif distribution == 'reversed':
+        return [float(key) for key in range(size, 0, -1)]
+    elif distribution == 'duplicates':
+        return [float(rng.randrange(10)) for _ in range(size)]
+    raise ValueError('Unsupported distribution.')
+
+
+def get_bound(size, complexity_class):
+    # as get_time_bound in pq2, for a heap of the given size
+    if complexity_class == 'constant':
+        return 1
+    elif complexity_class == 'linear':
+        return size + 1
+    elif complexity_class == 'logarithmic':
+        return math.log(max(size, 1), 2) + 1
+    elif complexity_class == 'square root':
+        return (2 * size) ** (1 / 2) + 1
+    raise ValueError('Unsupported complexity class.')
+
+
+def get_layout_operations(layout):
+    # each operation as a function of the heap and one argument, so that every layout is timed through one call
+    if layout == 'heapq':
+        return {
+            'build': heapq.heapify,
+            'insert': heapq.heappush,
+            'extract': lambda heap, _: heapq.heappop(heap),
+            'search': lambda heap, key: heap.index(key),
+            'max': lambda heap, _: max(heap)
+        }
+    parents = get_parents(layout)
+    pq1.get_routines(parents)
+    return {
+        'build': lambda heap: pq1.perform_heapification(heap, parents),
+        'insert': lambda heap, key: pq1.perform_insertion(heap, key, parents),
+        'extract': lambda heap, _: pq1.perform_extraction_and_get_min(heap, parents),
+        'search': lambda heap, key: pq1.search_for_key_and_get_index(heap, key, parents),
+        'max': lambda heap, _: pq1.get_max(heap, parents)
+    }
+
+
+def get_parents(layout):
+    return layout if layout == pq1.min_max_layout else int(layout)
+
+
+def get_calls(layout, operation, size, calls):
+    if complexity_classes[layout][operation] == 'linear':
+        calls = calls * 1000 // max(size, 1)
+    if operation == 'extract':
+        calls = min(calls, size)
+    return max(1, calls)
+
+
+def get_arguments(operation, distribution, heap, calls, rng):
+    if operation == 'insert':
+        # new keys continue the distribution, e.g. past the largest key if it is sorted
+        if distribution == 'sorted':
+            return [float(len(heap) + index) for index in range(calls)]
+        elif distribution == 'reversed':
+            return [float(-index) for index in range(calls)]
+        return get_keys(distribution, calls, rng)
+    elif operation == 'search':
+        return [rng.choice(heap) for _ in range(calls)]
+    return [None] * calls
+
+
+def time_calls(function, heap, arguments):
+    start = perf_counter_ns()
+    for argument in arguments:
+        function(heap, argument)
+    return perf_counter_ns() - start
+
+
+def run_benchmarks(sizes, layouts=('1', '2', pq1.min_max_layout, 'heapq'), benchmark_distributions=distributions,
+                   benchmark_operations=operations, calls=1000, repetitions=5, seed=0):
+    """returns one row per layout, distribution, size and operation"""
+    rng = random.Random(seed)
+    rows = []
+    for layout in layouts:
+        layout_operations = get_layout_operations(layout)
+        for distribution in benchmark_distributions:
+            for size in sizes:
+                heap = get_keys(distribution, size, rng)
+                layout_operations['build'](heap)
+                for operation in benchmark_operations:
+                    operation_calls = get_calls(layout, operation, size, calls)
+                    arguments = get_arguments(operation, distribution, heap, operation_calls, rng)
+                    times = [time_calls(layout_operations[operation], list(heap), arguments)
+                             for _ in range(repetitions)]
+                    ns_per_op = statistics.median(times) / operation_calls
+                    rows.append({'layout': layout, 'distribution': distribution, 'size': size,
+                                 'operation': operation, 'calls': operation_calls, 'repetitions': repetitions,
+                                 'ns_per_op': round(ns_per_op, 1),
+                                 'best_ns_per_op': round(min(times) / operation_calls, 1),
+                                 'ops_per_s': round(1e9 / ns_per_op, 1) if ns_per_op else math.inf})
+    return rows
+
+
+def check_bounds(sizes, layouts=('1', '2', pq1.min_max_layout), benchmark_distributions=distributions,
+                 benchmark_operations=operations, calls=100, seed=0):
+    """returns a message for each operation whose mean number of steps exceeds bound_factor times its bound"""
+    rng = random.Random(seed)
+    failures = []
+    for layout in layouts:
+        layout_operations = get_layout_operations(layout)
+        for distribution in benchmark_distributions:
+            for size in sizes:
+                heap = get_keys(distribution, size, rng)
+                layout_operations['build'](heap)
+                for operation in benchmark_operations:
+                    operation_calls = get_calls(layout, operation, size, calls)
+                    arguments = get_arguments(operation, distribution, heap, operation_calls, rng)
+                    with pq1.instrumentation() as probe:
+                        time_calls(layout_operations[operation], list(heap), arguments)
+                    mean_steps = probe.steps / operation_calls
+                    bound = get_bound(size + operation_calls, complexity_classes[layout][operation])
+                    if mean_steps > bound_factor * bound:
+                        failures.append('{} {} {} {}: {:.1f} steps per call exceeds {} x {:.1f}'.format(
+                            layout, distribution, size, operation, mean_steps, bound_factor, bound))
+    return failures
+
+
+def get_regressions(rows, baseline_rows, threshold):
+    """returns a message for each row which is slower than threshold times the matching row of the baseline"""
+    baseline = {get_row_key(row): float(row['ns_per_op']) for row in baseline_rows}
+    regressions = []
+    for row in rows:
+        baseline_ns_per_op = baseline.get(get_row_key(row))
+        if baseline_ns_per_op and float(row['ns_per_op']) > threshold * baseline_ns_per_op:
+            regressions.append('{} {} {} {}: {} ns/op against {} ns/op'.format(
+                *get_row_key(row), row['ns_per_op'], baseline_ns_per_op))
+    return regressions
+
+
+def get_row_key(row):
+    return str(row['layout']), row['distribution'], int(row['size']), row['operation']
+
+
+def write_rows(rows, path):
+    with open(path, 'w', newline='') as file:
+        if path.endswith('.csv'):
+            writer = csv.DictWriter(file, fields)
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            json.dump(rows, file, indent=1)
+
+
+def read_rows(path):
+    with open(path, newline='') as file:
+        return list(csv.DictReader(file)) if path.endswith('.csv') else json.load(file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Wall-clock benchmarks of pq1, against heapq.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--distributions', nargs='+', choices=distributions, default=distributions)
+    parser.add_argument('--layouts', nargs='+', choices=list(complexity_classes), default=list(complexity_classes))
+    parser.add_argument('--operations', type=int, default=1000, help='calls per timed batch')
+    parser.add_argument('--repetitions', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='a .json or .csv file for the results')
+    parser.add_argument('--baseline', help='the .json or .csv results of an earlier run')
+    parser.add_argument('--threshold', type=float, default=1.2, help='the slowdown against the baseline that fails')
+    parser.add_argument('--check-bounds', action='store_true')
+    args = parser.parse_args(argv)
+    rows = run_benchmarks(args.sizes, args.layouts, args.distributions, operations, args.operations,
+                          args.repetitions, args.seed)
+    for row in rows:
+        print('{layout:>8} {distribution:>10} {size:>9} {operation:>8} {ns_per_op:>14} ns/op {ops_per_s:>14} ops/s'
+              .format(**row))
+    if args.output:
+        write_rows(rows, args.output)
+    failures = []
+    if args.baseline:
+        failures += get_regressions(rows, read_rows(args.baseline), args.threshold)
+    if args.check_bounds:
+        failures += check_bounds(args.sizes, [layout for layout in args.layouts if layout != 'heapq'],
+                                 args.distributions)
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
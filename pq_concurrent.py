@@ -0,0 +1,134 @@
+"""
+Kyle Maclean
+Concurrent Priority Queues
+October 2026
+
+ConcurrentHeap and AsyncHeap are the standard library's queue.PriorityQueue and asyncio.PriorityQueue with their
+heapq-managed list replaced by one of the heap classes of pq1, which is chosen by the number of parents (1, 2 or
+pq1.min_max_layout) exactly as for the functional API. Blocking, timeouts, maxsize backpressure and task_done/join
+therefore behave as in the standard library. In addition:
+
+operation   | ConcurrentHeap                     | AsyncHeap
+------------------------------------------------------------------------------------------
+put many      one lock acquisition per batch,      -
+              waiting for room while bounded,
+              all or nothing if it can fail
+get many      one lock acquisition per batch       -
+remove        O(sqrt(n)) if parents == 2           O(sqrt(n)) if parents == 2
+contains      O(sqrt(n)) if parents == 2           O(sqrt(n)) if parents == 2
+
+Removing a key stands for cancelling it: the key counts as done for join(), and a waiting producer is woken.
+"""
+import asyncio
+import queue
+from time import monotonic
+
+import pq1
+
+
+class ConcurrentHeap(queue.PriorityQueue):
+    """thread-safe priority queue over a heap of pq1, guarded by the condition variables of queue.Queue"""
+
+    def __init__(self, maxsize=0, parents=1, typecode=None):
+        self.heap_class = pq1.get_heap_class(parents)
+        self.typecode = typecode
+        super().__init__(maxsize)
+
+    def _init(self, maxsize):
+        self.queue = self.heap_class((), self.typecode)
+
+    def _qsize(self):
+        return len(self.queue)
+
+    def _put(self, item):
+        self.queue.insert(item)
+
+    def _get(self):
+        return self.queue.extract_min()
+
+    def put_many(self, items, block=True, timeout=None):
+        # as many items as there is room for are inserted at once, then the rest wait for room as put would; a batch
+        # which may raise Full (without blocking, or with a timeout) is inserted all at once or not at all
+        items = list(items)
+        deadline = None if timeout is None else monotonic() + timeout
+        with self.not_full:
+            if self.maxsize > 0 and (not block or deadline is not None):
+                if len(items) > self.maxsize:
+                    raise queue.Full
+                self._wait(self.not_full, lambda: self._qsize() + len(items) <= self.maxsize, block, deadline,
+                           queue.Full)
+            first_index = 0
+            while first_index < len(items):
+                last_index = len(items)
+                if self.maxsize > 0:
+                    self._wait(self.not_full, lambda: self._qsize() < self.maxsize, block, deadline, queue.Full)
+                    last_index = min(last_index, first_index + self.maxsize - self._qsize())
+                self.queue.insert_many(items[first_index:last_index])
+                self.unfinished_tasks += last_index - first_index
+                self.not_empty.notify(last_index - first_index)
+                first_index = last_index
+
+    def get_many(self, k, block=True, timeout=None):
+        # waits, as get would, for one item, and then takes up to k of the smallest in order
+        deadline = None if timeout is None else monotonic() + timeout
+        with self.not_empty:
+            self._wait(self.not_empty, self._qsize, block, deadline, queue.Empty)
+            items = self.queue.extract_k_smallest(k)
+            self.not_full.notify(len(items))
+            return items
+
+    def contains(self, item):
+        with self.mutex:
+            return self.queue.search(item) is not None
+
+    def remove(self, item):
+        with self.mutex:
+            if not self.queue.delete_key(item):
+                return False
+            self.not_full.notify()
+            self.unfinished_tasks -= 1
+            if self.unfinished_tasks == 0:
+                self.all_tasks_done.notify_all()
+            return True
+
+    def _wait(self, condition, predicate, block, deadline, exception):
+        if not block:
+            if not predicate():
+                raise exception
+        elif deadline is None:
+            while not predicate():
+                condition.wait()
+        else:
+            while not predicate():
+                remaining = deadline - monotonic()
+                if remaining <= 0.0:
+                    raise exception
+                condition.wait(remaining)
+
+
+class AsyncHeap(asyncio.PriorityQueue):
+    """asyncio priority queue over a heap of pq1, for a single event loop"""
+
+    def __init__(self, maxsize=0, parents=1, typecode=None):
+        self.heap_class = pq1.get_heap_class(parents)
+        self.typecode = typecode
+        super().__init__(maxsize)
+
+    def _init(self, maxsize):
+        self._queue = self.heap_class((), self.typecode)
+
+    def _put(self, item):
+        self._queue.insert(item)
+
+    def _get(self):
+        return self._queue.extract_min()
+
+    def contains(self, item):
+        return self._queue.search(item) is not None
+
+    def remove(self, item):
+        if not self._queue.delete_key(item):
+            return False
+        self._wakeup_next(self._putters)
+        self.task_done()
+        return True
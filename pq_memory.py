@@ -0,0 +1,119 @@
+"""
+Kyle Maclean
+Memory Profiles of Priority Queues
+October 2026
+
+Usage: python pq_memory.py [--sizes 1000 100000] [--calls 100]
+
+Memory taken by the heap classes of pq1, for each layout and storage backend, measured with tracemalloc:
+
+bytes per key   the steady-state growth in traced memory from building a heap, per key, including the key objects
+                which a list holds but an array.array does not
+peak bytes      for each operation, the largest transient allocation made by any one call, i.e. the peak of traced
+                memory during the call less the traced memory before it
+retained blocks for each operation, the net number of memory blocks (by sys.getallocatedblocks) which the calls leave
+                allocated, per call: not every allocation, since a block which a call frees again is not counted
+
+The operations are timed on a heap which stays at its size: the keys extracted first are inserted again, into capacity
+which the list or array.array already has, before the queries. A hot operation should allocate nothing that grows
+with the heap: test_memory_regression in pq2 fails if one does.
+"""
+import argparse
+import gc
+import random
+import sys
+import tracemalloc
+
+import pq1
+
+backends = {'list': None, 'array': 'd'}
+layouts = [1, 2, pq1.min_max_layout]
+operations = ['extract_min', 'insert', 'get_min', 'get_max', 'search']
+
+
+def get_bytes_per_key(parents, typecode, size, seed=0):
+    rng = random.Random(seed)
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        gc.collect()
+        memory_before = tracemalloc.get_traced_memory()[0]
+        heap = pq1.get_heap_class(parents)((rng.random() for _ in range(size)), typecode)
+        gc.collect()
+        memory_after = tracemalloc.get_traced_memory()[0]
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+    del heap
+    return (memory_after - memory_before) / max(size, 1)
+
+
+def profile_operations(heap, calls, seed=0):
+    """returns, for each operation, the peak transient bytes of any one call and the blocks retained per call"""
+    rng = random.Random(seed)
+    keys = list(heap)
+    # the keys which extract_min will take, so that inserting them again leaves the heap as it was
+    insert_keys = sorted(keys)[:calls]
+    search_keys = [rng.choice(keys) for _ in range(calls)]
+    arguments = {'extract_min': [None] * calls, 'insert': insert_keys, 'get_min': [None] * calls,
+                 'get_max': [None] * calls, 'search': search_keys}
+    profile = {}
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        for operation in operations:
+            method = getattr(heap, operation)
+            peak_bytes = 0
+            gc.collect()
+            blocks_before = sys.getallocatedblocks()
+            for argument in arguments[operation]:
+                memory_before = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                if argument is None:
+                    method()
+                else:
+                    method(argument)
+                peak_bytes = max(peak_bytes, tracemalloc.get_traced_memory()[1] - memory_before)
+            blocks = sys.getallocatedblocks() - blocks_before
+            profile[operation] = {'peak_bytes': peak_bytes, 'retained_blocks_per_op': blocks / calls}
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+    return profile
+
+
+def get_profiles(sizes, profile_layouts=layouts, profile_backends=backends, calls=100, seed=0):
+    """returns one row per layout, backend and size"""
+    rows = []
+    for parents in profile_layouts:
+        for backend in profile_backends:
+            typecode = backends[backend]
+            for size in sizes:
+                rng = random.Random(seed)
+                heap = pq1.get_heap_class(parents)((rng.random() for _ in range(size)), typecode)
+                rows.append({'layout': str(parents), 'backend': backend, 'size': size,
+                             'bytes_per_key': round(get_bytes_per_key(parents, typecode, size, seed), 1),
+                             'operations': profile_operations(heap, min(calls, size), seed)})
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Memory profiles of the heaps of pq1, by layout and backend.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000])
+    parser.add_argument('--layouts', nargs='+', default=['1', '2', pq1.min_max_layout])
+    parser.add_argument('--backends', nargs='+', choices=list(backends), default=list(backends))
+    parser.add_argument('--calls', type=int, default=100)
+    args = parser.parse_args(argv)
+    profile_layouts = [layout if layout == pq1.min_max_layout else int(layout) for layout in args.layouts]
+    for row in get_profiles(args.sizes, profile_layouts, args.backends, args.calls):
+        print('{layout:>8} {backend:>6} {size:>9} {bytes_per_key:>8} bytes/key'.format(**row))
+        for operation, operation_profile in row['operations'].items():
+            print('{:>37} {:>8} peak bytes {:>8.2f} retained blocks/op'.format(
+                operation, operation_profile['peak_bytes'], operation_profile['retained_blocks_per_op']))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
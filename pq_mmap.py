@@ -0,0 +1,173 @@
+"""
+Kyle Maclean
+Memory-Mapped Priority Queues
+October 2026
+
+MappedHeap keeps a heap, beap or min-max heap of numeric keys in a file which is mapped into memory, so that a queue
+can outgrow RAM (the operating system pages keys in and out as the sifts reach them) and outlive the process which
+built it. The file is a 64-byte header (a magic number, the layout, the typecode, the length and the capacity) followed
+by the keys, which the routines of pq1 act on in place through a memoryview cast of the mapping. The capacity doubles
+whenever the keys fill it. Reopening a file maps it again and reads the header, in O(1): nothing is re-inserted.
+
+A sift touches one key per level. In a uniparental heap that is at most O(log(n)) pages, and fewer in practice, since
+the top levels share pages which stay resident. A beap's levels are contiguous too, but a sift crosses O(sqrt(n)) of
+them, each O(sqrt(n)) keys long, so it touches more pages than a heap of the same length: test_mapped_heap_page_faults
+in pq2 counts them.
+"""
+import mmap
+import os
+import struct
+from array import array
+
+import pq1
+
+header_format = '<8sqqqq'  # magic, layout, typecode, length, capacity
+header_size = 64
+length_index, capacity_index = 3, 4  # of the header, viewed as int64s
+magic = b'PQMMAP01'
+layouts = {1: 1, 2: 2, pq1.min_max_layout: 3}
+typecodes = 'bBhHiIlLqQfd'  # the numeric typecodes, which a memoryview can be cast to
+file_support = 'The file does not hold a memory-mapped priority queue.'
+
+
+class MappedHeap:
+    """numeric priority queue in a memory-mapped file, which can be reopened with MappedHeap.open"""
+
+    def __init__(self, path, parents=1, typecode='d', capacity=1024):
+        # creates (or truncates) the file; an existing queue is reopened with open() instead
+        if parents not in layouts:
+            raise ValueError(pq1.parent_support)
+        itemsize = memoryview(bytes(8)).cast(typecode).itemsize
+        with open(path, 'wb') as file:
+            file.write(struct.pack(header_format, magic, layouts[parents], ord(typecode), 0, capacity))
+            file.truncate(header_size + capacity * itemsize)
+        self._map(path)
+
+    @classmethod
+    def open(cls, path):
+        heap = cls.__new__(cls)
+        heap._map(path)
+        return heap
+
+    def _map(self, path):
+        self.path = path
+        self._file = open(path, 'r+b')
+        # an empty file cannot even be mapped, and a short one has no header
+        if os.fstat(self._file.fileno()).st_size < header_size:
+            self._file.close()
+            raise ValueError(file_support)
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+        header = struct.unpack_from(header_format, self._mmap)
+        layout_codes = {code: parents for parents, code in layouts.items()}
+        if header[0] != magic or header[1] not in layout_codes or \
+                header[2] not in [ord(typecode) for typecode in typecodes]:
+            self.close()
+            raise ValueError(file_support)
+        self.parents = layout_codes[header[1]]
+        self.typecode = chr(header[2])
+        layout_routines = pq1.get_routines(self.parents)
+        self._max_index, self._ascend = layout_routines.max_index, layout_routines.ascend
+        self._descend, self._search = layout_routines.descend, layout_routines.search
+        self._view()
+
+    def _view(self):
+        # the header's length and capacity are read and written in place
+        self._header = memoryview(self._mmap)[:header_size].cast('q')
+        self._keys = memoryview(self._mmap)[header_size:].cast(self.typecode)[:self._header[capacity_index]]
+
+    def _release(self):
+        self._keys.release()
+        self._header.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def __len__(self):
+        return self._header[length_index]
+
+    def __bool__(self):
+        return self._header[length_index] > 0
+
+    def __repr__(self):
+        return '{}({!r}, parents={!r}, typecode={!r}, length={})'.format(
+            type(self).__name__, self.path, self.parents, self.typecode, len(self))
+
+    @property
+    def capacity(self):
+        return self._header[capacity_index]
+
+    def snapshot(self):
+        # every operation has already been made on the mapping, so a snapshot only waits for it to reach the disk
+        self._mmap.flush()
+
+    def close(self):
+        if self._mmap.closed:
+            return
+        if hasattr(self, '_keys'):
+            self._release()
+        self._mmap.flush()
+        self._mmap.close()
+        self._file.close()
+
+    def get_min(self):
+        return self._keys[0] if len(self) > 0 else None
+
+    def get_max(self):
+        max_index = self._max_index(self._keys[:len(self)])
+        return None if max_index is None else self._keys[max_index]
+
+    def insert(self, key):
+        length = len(self)
+        if length == self.capacity:
+            self._grow(length + 1)
+        self._keys[length] = key
+        self._header[length_index] = length + 1
+        self._ascend(self._keys[:length + 1], length)
+
+    def insert_many(self, keys):
+        keys = array(self.typecode, keys)
+        length, new_length = len(self), len(self) + len(keys)
+        if new_length > self.capacity:
+            self._grow(new_length)
+        self._keys[length:new_length] = keys
+        self._header[length_index] = new_length
+        if len(keys) * pq1.get_sift_cost(new_length, self.parents) >= new_length:
+            pq1.heapify(self._keys[:new_length], self.parents, self._descend)
+        else:
+            for index in range(length, new_length):
+                self._ascend(self._keys[:index + 1], index)
+
+    def extract_min(self):
+        return self._pop_index(0) if len(self) > 0 else None
+
+    def extract_max(self):
+        max_index = self._max_index(self._keys[:len(self)])
+        return None if max_index is None else self._pop_index(max_index)
+
+    def search(self, key):
+        return self._search(self._keys[:len(self)], key)
+
+    def is_valid(self):
+        return pq1.is_valid(self._keys[:len(self)], self.parents)
+
+    def _pop_index(self, index):
+        keys = self._keys
+        length = len(self) - 1
+        key, keys[index] = keys[index], keys[length]
+        self._header[length_index] = length
+        if index < length:
+            self._ascend(keys[:length], index)
+            self._descend(keys[:length], index)
+        return key
+
+    def _grow(self, length):
+        # the capacity at least doubles, so that n insertions remap the file only O(log(n)) times
+        capacity = max(2 * self.capacity, length)
+        itemsize = self._keys.itemsize
+        self._release()
+        self._mmap.resize(header_size + capacity * itemsize)
+        struct.pack_into('<q', self._mmap, 8 * capacity_index, capacity)
+        self._view()
@@ -0,0 +1,236 @@
+"""
+Kyle Maclean
+Sharded Priority Queues
+October 2026
+
+ShardedHeap spreads numeric keys over several heaps (or beaps, or min-max heaps), each of which lives in its own block
+of shared memory behind its own lock, so that processes which share the queue contend only when they touch the same
+shard. Every shard is a fixed-capacity buffer: an int64 length followed by the keys, which the routines of pq1 act on in
+place through a memoryview cast of the buffer, and which NumPy sorts and validates in place through a view of the same
+bytes. Nothing is copied between processes: passing a ShardedHeap to a multiprocessing.Process attaches the child to the
+same shards.
+
+Let s be the number of shards and n the length of a shard.
+
+operation        | time
+-----------------------------------------------------------------------------------
+insert             O(log(n)) or O(sqrt(n)) if parents == 2, locking one shard
+extract (exact)    O(s) + O(log(n)) or O(sqrt(n)), locking every shard
+extract (k)        O(k) + O(log(n)) or O(sqrt(n)), locking k random shards
+min                O(s)
+
+With k shards sampled in place of all s, an extraction returns the smallest of k roots instead of the smallest of all
+of them: throughput rises with s / k, since extractions in different processes rarely wait for each other, while the
+order of the keys extracted is only approximate.
+"""
+import multiprocessing
+import queue
+import random
+from array import array
+from contextlib import contextmanager
+from multiprocessing.shared_memory import SharedMemory
+
+import pq1
+
+header_size = 8  # the length of a shard, as one int64, which also aligns the keys after it
+routing_support = 'Keys can only be routed to shards by round-robin or by hash.'
+
+
+class ShardedHeap:
+    """numeric priority queue over s shards of shared memory, for any number of processes"""
+
+    def __init__(self, shards=4, capacity=1 << 16, parents=1, typecode='d', routing='round-robin', context=None):
+        if routing not in ('round-robin', 'hash'):
+            raise ValueError(routing_support)
+        pq1.get_routines(parents)
+        self.parents, self.typecode, self.capacity, self.routing = parents, typecode, capacity, routing
+        itemsize = memoryview(bytes(8)).cast(typecode).itemsize
+        self._memories = [SharedMemory(create=True, size=header_size + capacity * itemsize) for _ in range(shards)]
+        # the locks must come from the same context (e.g. 'spawn') as the processes which will share them
+        self._locks = [multiprocessing.get_context(context).Lock() for _ in range(shards)]
+        self._is_owner = True
+        self._attach()
+
+    def __getstate__(self):
+        # a child process reattaches to the shards by name; the locks can only be inherited by starting a process
+        return (self.parents, self.typecode, self.capacity, self.routing, [memory.name for memory in self._memories],
+                self._locks)
+
+    def __setstate__(self, state):
+        self.parents, self.typecode, self.capacity, self.routing, names, self._locks = state
+        self._memories = [SharedMemory(name) for name in names]
+        self._is_owner = False
+        self._attach()
+
+    def _attach(self):
+        layout_routines = pq1.get_routines(self.parents)
+        self._ascend, self._descend = layout_routines.ascend, layout_routines.descend
+        self._lengths = [memory.buf[:header_size].cast('q') for memory in self._memories]
+        self._keys = [memory.buf[header_size:].cast(self.typecode)[:self.capacity] for memory in self._memories]
+        self._next_shard = random.randrange(len(self._memories))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+        if self._is_owner:
+            self.unlink()
+
+    def __len__(self):
+        # a snapshot, which other processes may already have changed
+        return sum(length[0] for length in self._lengths)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __repr__(self):
+        return '{}(shards={}, capacity={}, parents={!r})'.format(
+            type(self).__name__, len(self._memories), self.capacity, self.parents)
+
+    def close(self):
+        # the views are released first, since shared memory cannot be closed while anything still exports its buffer
+        for views in (self._lengths, self._keys):
+            for view in views:
+                view.release()
+        self._lengths, self._keys = [], []
+        for memory in self._memories:
+            memory.close()
+
+    def unlink(self):
+        for memory in self._memories:
+            memory.unlink()
+
+    def get_shard(self, key):
+        if self.routing == 'hash':
+            return hash(key) % len(self._memories)
+        shard = self._next_shard
+        self._next_shard = (shard + 1) % len(self._memories)
+        return shard
+
+    def get_min(self):
+        shards = range(len(self._memories))
+        with self._lock_shards(shards):
+            min_shard = self._get_min_shard(shards)
+            return None if min_shard is None else self._keys[min_shard][0]
+
+    def insert(self, key):
+        # a full shard passes the key on to the next, unless keys are routed by hash
+        first_shard = self.get_shard(key)
+        shards = [first_shard] if self.routing == 'hash' else \
+            [(first_shard + offset) % len(self._memories) for offset in range(len(self._memories))]
+        for shard in shards:
+            with self._locks[shard]:
+                length = self._lengths[shard][0]
+                if length < self.capacity:
+                    keys = self._keys[shard]
+                    keys[length] = key
+                    self._lengths[shard][0] = length + 1
+                    self._ascend(keys[:length + 1], length)
+                    return
+        raise queue.Full
+
+    def insert_many(self, keys):
+        # keys are grouped by shard, so that each shard is locked once and rebuilt if that is cheaper than sifting; the
+        # shards stay locked for the whole batch, so that a batch which does not fit inserts nothing
+        shard_count = len(self._memories)
+        if self.routing == 'hash':
+            shard_keys = [[] for _ in self._memories]
+            for key in keys:
+                shard_keys[self.get_shard(key)].append(key)
+            shards = [shard for shard in range(shard_count) if shard_keys[shard]]
+        else:
+            keys = list(keys)
+            shards = range(shard_count)
+        with self._lock_shards(shards):
+            rooms = {shard: self.capacity - self._lengths[shard][0] for shard in shards}
+            if self.routing == 'hash':
+                if any(len(shard_keys[shard]) > rooms[shard] for shard in shards):
+                    raise queue.Full
+            else:
+                if len(keys) > sum(rooms.values()):
+                    raise queue.Full
+                # as by insert, a full shard passes the key on to the next
+                shard_keys = [[] for _ in self._memories]
+                for key in keys:
+                    shard = self.get_shard(key)
+                    while rooms[shard] == 0:
+                        shard = (shard + 1) % shard_count
+                    rooms[shard] -= 1
+                    shard_keys[shard].append(key)
+            for shard in shards:
+                if shard_keys[shard]:
+                    self._insert_keys(shard, shard_keys[shard])
+
+    def extract_min(self, k=None):
+        """exact unless k is given, in which case the smallest root among k random shards is extracted instead"""
+        shards = range(len(self._memories))
+        if k is not None and k < len(self._memories):
+            key = self._extract_min(sorted(random.sample(shards, k)))
+            if key is not None:
+                return key
+        return self._extract_min(shards)
+
+    def extract_k_smallest(self, k):
+        # exact, with every shard locked once for the whole batch
+        shards = range(len(self._memories))
+        mins = []
+        with self._lock_shards(shards):
+            for _ in range(k):
+                min_shard = self._get_min_shard(shards)
+                if min_shard is None:
+                    break
+                mins.append(self._pop_min(min_shard))
+        return mins
+
+    def is_valid(self):
+        shards = range(len(self._memories))
+        with self._lock_shards(shards):
+            return all(pq1.is_valid(self._keys[shard][:self._lengths[shard][0]], self.parents) for shard in shards)
+
+    @contextmanager
+    def _lock_shards(self, shards):
+        # always in ascending order of shard, so that two processes locking overlapping shards cannot deadlock
+        locks = [self._locks[shard] for shard in sorted(shards)]
+        for lock in locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    def _get_min_shard(self, shards):
+        min_shard = None
+        for shard in shards:
+            if self._lengths[shard][0] > 0 and (min_shard is None or self._keys[shard][0] < self._keys[min_shard][0]):
+                min_shard = shard
+        return min_shard
+
+    def _extract_min(self, shards):
+        with self._lock_shards(shards):
+            min_shard = self._get_min_shard(shards)
+            return None if min_shard is None else self._pop_min(min_shard)
+
+    def _pop_min(self, shard):
+        keys = self._keys[shard]
+        length = self._lengths[shard][0] - 1
+        root = keys[0]
+        keys[0] = keys[length]
+        self._lengths[shard][0] = length
+        if length > 1:
+            self._descend(keys[:length], 0)
+        return root
+
+    def _insert_keys(self, shard, new_keys):
+        keys, length = self._keys[shard], self._lengths[shard][0]
+        new_length = length + len(new_keys)
+        if new_length > self.capacity:
+            raise queue.Full
+        keys[length:new_length] = array(self.typecode, new_keys)
+        self._lengths[shard][0] = new_length
+        if len(new_keys) * pq1.get_sift_cost(new_length, self.parents) >= new_length:
+            pq1.heapify(keys[:new_length], self.parents, self._descend)
+        else:
+            for index in range(length, new_length):
+                self._ascend(keys[:index + 1], index)
@@ -0,0 +1,187 @@
+"""
+Kyle Maclean
+Traces of Priority Queue Workloads
+October 2026
+
+Usage: python pq_trace.py path/trace.jsonl [--layouts 1 2 min-max] [--typecode d]
+
+A trace is a JSONL stream with one record per operation, e.g. {"op": "insert", "key": 3.5} or {"op": "extract_min"}:
+the op is the name of a method of the heap classes of pq1 (insert, extract_min, extract_max, search, delete_key,
+get_min or get_max) and the key, if the method takes one, is its argument. replace_key and decrease_key also record
+their second argument, as in {"op": "replace_key", "key": 3.5, "new_key": 1.5}. TraceRecorder wraps a heap, passing
+every call on to it and appending the call to a trace, so that a live workload can be captured as it runs: batches are
+recorded key by key (insert_many and merge as inserts, and extract_k_smallest as extract_mins), and any other method
+which changes the heap is refused, so that a trace cannot silently diverge from the run it records. replay reads a
+whole trace into memory first, then drives a fresh heap of any layout through it, timing each call on its own, and
+get_report summarises those times as percentiles (p50, p99 and p999, in nanoseconds) per operation.
+"""
+import argparse
+import json
+import math
+import sys
+from time import perf_counter_ns
+
+import pq1
+
+keyed_operations = {'insert', 'search', 'delete_key'}
+unkeyed_operations = {'extract_min', 'extract_max', 'get_min', 'get_max'}
+replacing_operations = {'replace_key', 'decrease_key'}
+batch_operations = {'insert_many', 'merge', 'extract_k_smallest'}
+untraced_operations = {'search_many', 'is_valid', 'get_first_violation_index', 'count_less_than', 'rank',
+                       'iter_range', 'parents'}  # which do not change the heap
+percentiles = {'p50': 0.5, 'p99': 0.99, 'p999': 0.999}
+operation_support = 'Only the operations insert, extract_min, extract_max, search, delete_key, get_min, get_max, ' \
+                    'replace_key and decrease_key can be traced.'
+
+
+class TraceRecorder:
+    """a heap of pq1 which appends each operation on it to a trace file"""
+
+    def __init__(self, heap, path):
+        self.heap = heap
+        self._file = open(path, 'w')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __getattr__(self, name):
+        # anything which does not change the heap goes straight to it
+        if name in keyed_operations or name in unkeyed_operations or name in replacing_operations:
+            return self._get_traced_operation(name)
+        elif name in batch_operations:
+            return getattr(self, '_' + name)
+        elif name in untraced_operations:
+            return getattr(self.heap, name)
+        raise AttributeError('{} is not traced.'.format(name))
+
+    def close(self):
+        self._file.close()
+
+    def _write(self, name, key=None, new_key=None):
+        record = {'op': name}
+        if key is not None:
+            record['key'] = key
+        if new_key is not None:
+            record['new_key'] = new_key
+        self._file.write(json.dumps(record) + '\n')
+
+    def _get_traced_operation(self, name):
+        # a call is recorded once it has returned, so that a call which raises is not replayed
+        operation = getattr(self.heap, name)
+        write = self._write
+        if name in keyed_operations:
+            def traced_operation(key):
+                result = operation(key)
+                write(name, key)
+                return result
+        elif name in replacing_operations:
+            def traced_operation(key, new_key):
+                result = operation(key, new_key)
+                write(name, key, new_key)
+                return result
+        else:
+            def traced_operation():
+                result = operation()
+                write(name)
+                return result
+        return traced_operation
+
+    def _insert_many(self, keys):
+        keys = list(keys)
+        self.heap.insert_many(keys)
+        for key in keys:
+            self._write('insert', key)
+
+    def _merge(self, other):
+        keys = list(other)
+        self.heap.merge(other if isinstance(other, pq1.BinaryHeap) else keys)
+        for key in keys:
+            self._write('insert', key)
+
+    def _extract_k_smallest(self, k):
+        mins = self.heap.extract_k_smallest(k)
+        for _ in mins:
+            self._write('extract_min')
+        return mins
+
+
+def read_trace(path):
+    """returns a list of (operation, key) pairs, where the key is None for operations without one and a (key, new_key)
+    pair for replace_key and decrease_key"""
+    records = []
+    with open(path) as file:
+        for line in file:
+            if line.strip():
+                record = json.loads(line)
+                operation = record['op']
+                if operation in replacing_operations:
+                    records.append((operation, (record['key'], record['new_key'])))
+                elif operation in keyed_operations or operation in unkeyed_operations:
+                    records.append((operation, record.get('key')))
+                else:
+                    raise ValueError(operation_support)
+    return records
+
+
+def replay(records, parents, typecode=None, arity=2):
+    """returns the nanoseconds taken by each call, by operation, when a new heap of the layout is driven by records"""
+    heap = pq1.get_heap_class(parents)((), typecode, arity=arity)
+    latencies = {}
+    for operation, key in records:
+        function = getattr(heap, operation)
+        if operation in keyed_operations:
+            start = perf_counter_ns()
+            function(key)
+            latency = perf_counter_ns() - start
+        elif operation in replacing_operations:
+            old_key, new_key = key
+            start = perf_counter_ns()
+            function(old_key, new_key)
+            latency = perf_counter_ns() - start
+        else:
+            start = perf_counter_ns()
+            function()
+            latency = perf_counter_ns() - start
+        latencies.setdefault(operation, []).append(latency)
+    return latencies
+
+
+def get_percentile(sorted_latencies, fraction):
+    # nearest rank: the smallest latency which at least that fraction of latencies are at most
+    return sorted_latencies[max(0, math.ceil(fraction * len(sorted_latencies)) - 1)]
+
+
+def get_report(latencies):
+    report = {}
+    for operation, operation_latencies in latencies.items():
+        sorted_latencies = sorted(operation_latencies)
+        report[operation] = {'count': len(sorted_latencies)}
+        for name, fraction in percentiles.items():
+            report[operation][name] = get_percentile(sorted_latencies, fraction)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replays a trace on heaps of pq1, reporting latency percentiles.')
+    parser.add_argument('trace')
+    parser.add_argument('--layouts', nargs='+', default=['1', '2', pq1.min_max_layout])
+    parser.add_argument('--typecode')
+    args = parser.parse_args(argv)
+    records = read_trace(args.trace)
+    for layout in args.layouts:
+        parents = layout if layout == pq1.min_max_layout else int(layout)
+        report = get_report(replay(records, parents, args.typecode))
+        for operation, row in report.items():
+            print('{:>8} {:>12} {:>9} calls  p50 {:>9} ns  p99 {:>9} ns  p999 {:>9} ns'.format(
+                layout, operation, row['count'], row['p50'], row['p99'], row['p999']))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
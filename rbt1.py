@@ -0,0 +1,341 @@
+"""
+Kyle Maclean
+Order-Statistic Red-Black Trees
+October 2026
+
+A Python counterpart of rbt.hs: a red-black tree of distinct keys, balanced on insertion as by Okasaki and on deletion
+as by Kahrs (balance, balL, balR and fuse keep their names from rbt.hs), in which every node also counts the nodes of
+its subtree, so that a key can be found by its position in sorted order.
+
+Let n be the number of keys in the tree.
+
+operation     | time
+----------------------------------------
+search          O(log(n))
+min, max        O(log(n))
+insert          O(log(n))
+delete          O(log(n))
+extract min     O(log(n))
+kth, median     O(log(n))
+rank            O(log(n))
+traverse        O(n)
+intersection    O(n + m), for a second tree of m keys
+
+Nodes are not objects but indices into parallel storage: a bytearray of colours, arrays of left and right child indices
+and of subtree counts, and the keys, which are a compact array.array when a typecode is given and a list otherwise.
+Index 0 stands for every Leaf, and the indices of deleted nodes are kept on a free list, for insertions to reuse.
+As in rbt.hs, inserting a key which is already present does nothing.
+"""
+from array import array
+
+red, black = 0, 1
+leaf = 0  # the index of the one node which stands for every Leaf: black, and counting no nodes
+
+
+class RedBlackTree:
+    """order-statistic red-black tree over parallel arrays, whose nodes are indices"""
+    __slots__ = ('_colours', '_lefts', '_rights', '_counts', '_keys', '_free', '_root')
+
+    def __init__(self, keys=(), typecode=None):
+        self._colours = bytearray([black])
+        self._lefts = array('q', [leaf])
+        self._rights = array('q', [leaf])
+        self._counts = array('q', [0])
+        self._keys = [None] if typecode is None else array(typecode, [0])
+        self._free = []
+        self._root = leaf
+        for key in keys:
+            self.insert(key)
+
+    def __len__(self):
+        return self._counts[self._root]
+
+    def __bool__(self):
+        return self._root != leaf
+
+    def __contains__(self, key):
+        return self.search(key)
+
+    def __iter__(self):
+        return iter(self.traverse())
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, self.traverse())
+
+    def search(self, key):
+        keys, lefts, rights = self._keys, self._lefts, self._rights
+        node = self._root
+        while node != leaf:
+            node_key = keys[node]
+            if key == node_key:
+                return True
+            node = lefts[node] if key < node_key else rights[node]
+        return False
+
+    def get_min(self):
+        return None if self._root == leaf else self._keys[self._get_extreme(self._lefts)]
+
+    def get_max(self):
+        return None if self._root == leaf else self._keys[self._get_extreme(self._rights)]
+
+    def traverse(self):
+        # the keys in order, from an explicit stack rather than recursion
+        keys, lefts, rights = self._keys, self._lefts, self._rights
+        ordered_keys = []
+        stack = []
+        node = self._root
+        while stack or node != leaf:
+            while node != leaf:
+                stack.append(node)
+                node = lefts[node]
+            node = stack.pop()
+            ordered_keys.append(keys[node])
+            node = rights[node]
+        return ordered_keys
+
+    def insert(self, key):
+        """returns whether the key was inserted, i.e. was not already present"""
+        if self.search(key):
+            return False
+        root = self._ins(key, self._root)
+        self._colours[root] = black
+        self._root = root
+        return True
+
+    def delete(self, key):
+        """returns whether the key was deleted, i.e. was present"""
+        if not self.search(key):
+            return False
+        root = self._del(key, self._root)
+        self._colours[root] = black
+        self._root = root
+        return True
+
+    def extract_min(self):
+        key = self.get_min()
+        if key is not None:
+            self.delete(key)
+        return key
+
+    def extract_max(self):
+        key = self.get_max()
+        if key is not None:
+            self.delete(key)
+        return key
+
+    def kth(self, index):
+        """the key at the index (from 1) of the keys in order, as at in rbt.hs"""
+        if not 1 <= index <= len(self):
+            raise IndexError(index)
+        keys, lefts, rights, counts = self._keys, self._lefts, self._rights, self._counts
+        node = self._root
+        while True:
+            l_count = counts[lefts[node]]
+            if index <= l_count:
+                node = lefts[node]
+            elif index == l_count + 1:
+                return keys[node]
+            else:
+                index -= l_count + 1
+                node = rights[node]
+
+    def rank(self, key):
+        """how many keys are at most the key, which is its index (from 1) in order if it is present"""
+        keys, lefts, rights, counts = self._keys, self._lefts, self._rights, self._counts
+        node = self._root
+        count = 0
+        while node != leaf:
+            if key < keys[node]:
+                node = lefts[node]
+            else:
+                count += counts[lefts[node]] + 1
+                node = rights[node]
+        return count
+
+    def median(self):
+        # as in rbt.hs, the mean of the two middle keys if there is an even number of them
+        size = len(self)
+        if size == 0:
+            return None
+        middle_index = size // 2 + 1
+        if size % 2 == 0:
+            return (self.kth(middle_index - 1) + self.kth(middle_index)) / 2
+        return self.kth(middle_index)
+
+    def intersection(self, other):
+        # both trees are traversed in order, and the two sorted lists are merged in one pass, as int in rbt.hs
+        keys, other_keys = self.traverse(), other.traverse()
+        common_keys = []
+        index = other_index = 0
+        while index < len(keys) and other_index < len(other_keys):
+            key, other_key = keys[index], other_keys[other_index]
+            if key == other_key:
+                common_keys.append(key)
+                index += 1
+                other_index += 1
+            elif key > other_key:
+                other_index += 1
+            else:
+                index += 1
+        return common_keys
+
+    def is_valid(self):
+        """whether the keys are ordered, no red node has a red child, every path has as many black nodes, and every
+        count is right"""
+        if self._colours[self._root] != black:
+            return False
+        return self._get_black_height(self._root, None, None) is not None
+
+    def _get_black_height(self, node, low_key, high_key):
+        if node == leaf:
+            return 1
+        key, l_node, r_node = self._keys[node], self._lefts[node], self._rights[node]
+        if low_key is not None and not low_key < key or high_key is not None and not key < high_key:
+            return None
+        if self._colours[node] == red and red in (self._colours[l_node], self._colours[r_node]):
+            return None
+        if self._counts[node] != self._counts[l_node] + self._counts[r_node] + 1:
+            return None
+        l_height = self._get_black_height(l_node, low_key, key)
+        if l_height is None or l_height != self._get_black_height(r_node, key, high_key):
+            return None
+        return l_height + (self._colours[node] == black)
+
+    def _get_extreme(self, children):
+        node = self._root
+        while children[node] != leaf:
+            node = children[node]
+        return node
+
+    def _new_node(self, key):
+        # new nodes are red, in a slot freed by a deletion if there is one
+        if self._free:
+            node = self._free.pop()
+            self._keys[node] = key
+            self._set_node(node, red, leaf, leaf)
+            return node
+        self._colours.append(red)
+        self._lefts.append(leaf)
+        self._rights.append(leaf)
+        self._counts.append(1)
+        self._keys.append(key)
+        return len(self._colours) - 1
+
+    def _set_node(self, node, colour, l_node, r_node):
+        # Node colour l_node _ key r_node _, with the count of its subtree
+        self._colours[node] = colour
+        self._lefts[node] = l_node
+        self._rights[node] = r_node
+        self._counts[node] = self._counts[l_node] + self._counts[r_node] + 1
+        return node
+
+    def _is_red(self, node):
+        return self._colours[node] == red
+
+    def _ins(self, key, node):
+        if node == leaf:
+            return self._new_node(key)
+        if key < self._keys[node]:
+            self._lefts[node] = self._ins(key, self._lefts[node])
+        else:
+            self._rights[node] = self._ins(key, self._rights[node])
+        self._counts[node] += 1
+        return self._balance(node)
+
+    def _balance(self, node):
+        # fixes a double red below a black node, by rebuilding the three nodes involved around the middle key
+        if self._colours[node] != black or node == leaf:
+            return node
+        lefts, rights = self._lefts, self._rights
+        l_node, r_node = lefts[node], rights[node]
+        if self._is_red(l_node) and self._is_red(lefts[l_node]):
+            x, y, z = lefts[l_node], l_node, node
+            subtrees = lefts[x], rights[x], rights[y], rights[z]
+        elif self._is_red(l_node) and self._is_red(rights[l_node]):
+            x, y, z = l_node, rights[l_node], node
+            subtrees = lefts[x], lefts[y], rights[y], rights[z]
+        elif self._is_red(r_node) and self._is_red(rights[r_node]):
+            x, y, z = node, r_node, rights[r_node]
+            subtrees = lefts[x], lefts[y], lefts[z], rights[z]
+        elif self._is_red(r_node) and self._is_red(lefts[r_node]):
+            x, y, z = node, lefts[r_node], r_node
+            subtrees = lefts[x], lefts[y], rights[y], rights[z]
+        else:
+            return node
+        t1, t2, t3, t4 = subtrees
+        return self._set_node(y, red, self._set_node(x, black, t1, t2), self._set_node(z, black, t3, t4))
+
+    def _red_root(self, node):
+        if node != leaf:
+            self._colours[node] = red
+        return node
+
+    def _del(self, key, node):
+        node_key = self._keys[node]
+        l_node, r_node = self._lefts[node], self._rights[node]
+        if key < node_key:
+            if self._is_red(l_node):
+                return self._set_node(node, red, self._del(key, l_node), r_node)
+            self._lefts[node] = self._del(key, l_node)
+            return self._bal_l(node)
+        if node_key < key:
+            if self._is_red(r_node):
+                return self._set_node(node, red, l_node, self._del(key, r_node))
+            self._rights[node] = self._del(key, r_node)
+            return self._bal_r(node)
+        self._free.append(node)
+        return self._fuse(l_node, r_node)
+
+    def _bal_l(self, node):
+        # the left subtree has one black node too few on its paths
+        lefts, rights = self._lefts, self._rights
+        l_node, r_node = lefts[node], rights[node]
+        if self._is_red(l_node):
+            self._colours[l_node] = black
+            return self._set_node(node, red, l_node, r_node)
+        if not self._is_red(r_node):
+            self._colours[r_node] = red
+            return self._balance(self._set_node(node, black, l_node, r_node))
+        rl_node = lefts[r_node]
+        t2, t3, t4 = lefts[rl_node], rights[rl_node], rights[r_node]
+        new_r_node = self._balance(self._set_node(r_node, black, t3, self._red_root(t4)))
+        return self._set_node(rl_node, red, self._set_node(node, black, l_node, t2), new_r_node)
+
+    def _bal_r(self, node):
+        # the right subtree has one black node too few on its paths
+        lefts, rights = self._lefts, self._rights
+        l_node, r_node = lefts[node], rights[node]
+        if self._is_red(r_node):
+            self._colours[r_node] = black
+            return self._set_node(node, red, l_node, r_node)
+        if not self._is_red(l_node):
+            self._colours[l_node] = red
+            return self._balance(self._set_node(node, black, l_node, r_node))
+        lr_node = rights[l_node]
+        t1, t2, t3 = lefts[l_node], lefts[lr_node], rights[lr_node]
+        new_l_node = self._balance(self._set_node(l_node, black, self._red_root(t1), t2))
+        return self._set_node(lr_node, red, new_l_node, self._set_node(node, black, t3, r_node))
+
+    def _fuse(self, l_node, r_node):
+        # joins two subtrees of equal black height, all of whose keys on the left are below those on the right
+        if l_node == leaf:
+            return r_node
+        if r_node == leaf:
+            return l_node
+        lefts, rights = self._lefts, self._rights
+        l_is_red, r_is_red = self._is_red(l_node), self._is_red(r_node)
+        if not l_is_red and r_is_red:
+            return self._set_node(r_node, red, self._fuse(l_node, lefts[r_node]), rights[r_node])
+        if l_is_red and not r_is_red:
+            return self._set_node(l_node, red, lefts[l_node], self._fuse(rights[l_node], r_node))
+        middle_node = self._fuse(rights[l_node], lefts[r_node])
+        colour = red if l_is_red else black
+        if self._is_red(middle_node):
+            m_l_node, m_r_node = lefts[middle_node], rights[middle_node]
+            return self._set_node(middle_node, red, self._set_node(l_node, colour, lefts[l_node], m_l_node),
+                                  self._set_node(r_node, colour, m_r_node, rights[r_node]))
+        if l_is_red:
+            return self._set_node(l_node, red, lefts[l_node],
+                                  self._set_node(r_node, red, middle_node, rights[r_node]))
+        self._set_node(r_node, black, middle_node, rights[r_node])
+        return self._bal_l(self._set_node(l_node, black, lefts[l_node], r_node))
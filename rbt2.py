@@ -0,0 +1,92 @@
+"""
+Kyle Maclean
+Tests for Order-Statistic Red-Black Trees
+October 2026
+"""
+
+import random
+import statistics
+from unittest import TestCase
+
+import rbt1
+
+
+class UnitTests(TestCase):
+    def test_insert_and_delete_correctness(self):
+        for _ in range(10):
+            tree = rbt1.RedBlackTree()
+            keys = set()
+            for _ in range(500):
+                key = random.randrange(0, 200, 1)
+                if random.random() < 0.6:
+                    self.assertEqual(key not in keys, tree.insert(key))
+                    keys.add(key)
+                else:
+                    self.assertEqual(key in keys, tree.delete(key))
+                    keys.discard(key)
+                self.assertTrue(tree.is_valid())
+                self.assertEqual(len(keys), len(tree))
+            self.assertEqual(sorted(keys), tree.traverse())
+            for key in range(-1, 201):
+                self.assertEqual(key in keys, key in tree)
+
+    def test_free_list_correctness(self):
+        tree = rbt1.RedBlackTree(range(100))
+        for key in range(0, 100, 2):
+            tree.delete(key)
+        for key in range(100, 150):
+            tree.insert(key)
+        # the 50 deleted nodes are reused, beside the leaf
+        self.assertEqual(101, len(tree._colours))
+        self.assertTrue(tree.is_valid())
+        self.assertEqual(list(range(1, 100, 2)) + list(range(100, 150)), tree.traverse())
+
+    def test_min_max_correctness(self):
+        tree = rbt1.RedBlackTree(typecode='d')
+        self.assertIsNone(tree.get_min())
+        self.assertIsNone(tree.get_max())
+        self.assertIsNone(tree.extract_min())
+        keys = random.sample(range(1000), 300)
+        for key in keys:
+            tree.insert(key)
+        self.assertEqual(min(keys), tree.get_min())
+        self.assertEqual(max(keys), tree.get_max())
+        self.assertEqual(max(keys), tree.extract_max())
+        self.assertEqual(sorted(keys)[:-1], [tree.extract_min() for _ in range(299)])
+        self.assertFalse(tree)
+
+    def test_order_statistics_correctness(self):
+        for tree_size in [1, 2, 3, 10, 101, 1000]:
+            keys = sorted(random.sample(range(10 * tree_size), tree_size))
+            tree = rbt1.RedBlackTree(random.sample(keys, tree_size), 'q')
+            self.assertEqual(statistics.median(keys), tree.median())
+            for index, key in enumerate(keys):
+                self.assertEqual(key, tree.kth(index + 1))
+                self.assertEqual(index + 1, tree.rank(key))
+            self.assertEqual(0, tree.rank(keys[0] - 1))
+            self.assertEqual(tree_size, tree.rank(keys[-1] + 1))
+            with self.assertRaises(IndexError):
+                tree.kth(0)
+            with self.assertRaises(IndexError):
+                tree.kth(tree_size + 1)
+        # the examples of rbt.hs
+        self.assertEqual(16, rbt1.RedBlackTree([8, 16, 32]).median())
+        self.assertEqual(12.5, rbt1.RedBlackTree([8, 9, 16, 32]).median())
+        self.assertIsNone(rbt1.RedBlackTree().median())
+
+    def test_intersection_correctness(self):
+        for _ in range(10):
+            keys = set(random.sample(range(500), random.randrange(0, 200, 1)))
+            other_keys = set(random.sample(range(500), random.randrange(0, 200, 1)))
+            tree, other_tree = rbt1.RedBlackTree(keys), rbt1.RedBlackTree(other_keys)
+            self.assertEqual(sorted(keys & other_keys), tree.intersection(other_tree))
+            self.assertEqual(sorted(keys & other_keys), other_tree.intersection(tree))
+
+    def test_large_tree_correctness(self):
+        keys = random.sample(range(10 ** 7), 100000)
+        tree = rbt1.RedBlackTree(keys, 'q')
+        self.assertTrue(tree.is_valid())
+        for key in keys[:50000]:
+            tree.delete(key)
+        self.assertTrue(tree.is_valid())
+        self.assertEqual(sorted(keys[50000:]), tree.traverse())
@@ -3,11 +3,20 @@
 # November 2021
 
 # Usage: python sc.py path/input.png path/output.png n_seams
+#        python sc.py --order path/input.png path/order.npy [n_seams]
+#        python sc.py --retarget path/input.png path/order.npy path/output.png width
 
+# --order carves the input once, as far as n_seams (by default to one column), and saves the seam in which each pixel
+# is removed, from which --retarget makes the same image as carving to any width within that, without carving again
+
+from collections import namedtuple
 from sys import argv
 import cv2
 import numpy as np
 
+SeamBuffers = namedtuple('SeamBuffers', ['costs', 'row_offsets', 'seam'])
+max_energy = 2 * 4 * 255  # the largest |x gradient| + |y gradient| of a 3x3 Sobel of uint8 greys
+
 
 def get_sobel_gradient(grey):
     # https://docs.opencv.org/4.x/d2/d2c/tutorial_sobel_derivatives.html
@@ -16,56 +25,119 @@ def get_sobel_gradient(grey):
     return np.absolute(x_gradient) + np.absolute(y_gradient)
 
 
-def get_absolute_seam(e):
+def get_seam_buffers(rows, cols):
+    # the cumulative cost of a seam through a pixel is at most rows * max_energy, which rarely needs more than int32
+    cost_dtype = np.int32 if rows * max_energy <= np.iinfo(np.int32).max else np.int64
+    return SeamBuffers(costs=np.empty((rows, cols), dtype=cost_dtype), row_offsets=np.arange(rows, dtype=np.intp),
+                       seam=np.empty(rows, dtype=np.intp))
+
+
+def get_relative_seam(e, buffers=None):
     # https://dl.acm.org/doi/10.1145/1276377.1276390
+    # the seam's column in each row is written into buffers.seam, which the next call with the same buffers overwrites
     rows, cols = e.shape
-    M_indices = np.empty((rows, cols), dtype=np.int32)
-    M = np.copy(e)
-    middle_indices_offset = np.arange(cols - 2)
-    for row in range(rows):
-        # M(i, 0) = e(i, 0) + min(M(i−1, 0), M(i−1, 1))
-        left_min_index = np.argmin(M[row][:2], axis=0)
-        # M(i, width) = e(i, width) + min(M(i−1, width−1), M(i−1, width))
-        right_min_index = np.argmin(M[row][-2:], axis=0) + (cols - 2)
-        # M(i, j) = e(i, j) + min(M(i−1, j−1), M(i−1, j), M(i−1, j+1))
-        middle_min_indices = np.argmin([M[row][:-2], M[row][1:-1], M[row][2:]], axis=0) + middle_indices_offset
-        M_indices[row] = np.concatenate(([left_min_index], middle_min_indices, [right_min_index]))
-        if row == rows - 1:
-            break
-        M[row + 1] = e[row + 1] + M[row][M_indices[row]]
-    min_cols = [-1] * rows
-    min_cols[-1] = int(np.argmin(M[-1]))
-    for row in reversed(range(1, rows)):
-        min_cols[row - 1] = M_indices[row - 1, min_cols[row]]
-    return [(min_cols[row] + row * cols) for row in range(rows)]
+    if buffers is None:
+        buffers = get_seam_buffers(rows, cols)
+    # the buffers may be wider than e, after seams have been removed
+    M = buffers.costs[:, :cols]
+    M[0] = e[0]
+    for row in range(1, rows):
+        previous_costs, costs = M[row - 1], M[row]
+        # M(i, j) = e(i, j) + min(M(i−1, j−1), M(i−1, j), M(i−1, j+1)), at the edges without the missing neighbour
+        np.minimum(previous_costs[:-1], previous_costs[1:], out=costs[:-1])
+        costs[-1] = previous_costs[-1]
+        np.minimum(costs[1:], previous_costs[:-1], out=costs[1:])
+        np.add(costs, e[row], out=costs)
+    # the predecessor of each pixel of the seam is found again from the costs above it, rather than kept for all pixels
+    seam = buffers.seam[:rows]
+    col = int(np.argmin(M[-1]))
+    seam[-1] = col
+    for row in range(rows - 1, 0, -1):
+        left_col = col - 1 if col > 0 else 0
+        col = left_col + int(M[row - 1, left_col:col + 2].argmin())
+        seam[row - 1] = col
+    return seam
 
 
-def get_carved_image(bgr, n_seams):
+def get_absolute_seam(e, buffers=None):
+    rows, cols = e.shape
+    if buffers is None:
+        buffers = get_seam_buffers(rows, cols)
+    seam = get_relative_seam(e, buffers)
+    seam += buffers.row_offsets[:rows] * cols
+    return seam
+
+
+def carve_pixels(bgr, n_seams, seam_order=None):
+    # one working buffer of 8 bytes a pixel: b, g, r and grey, then energy as an int16, then the pixel's column in bgr
+    # as a uint16, so that a pixel moves as one uint64; its first width columns are the image
     h, w, c = bgr.shape
-    grey = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
-    b = bgr[:, :, 0]
-    g = bgr[:, :, 1]
-    r = bgr[:, :, 2]
-    energy = get_sobel_gradient(grey)
+    pixels = np.zeros((h, w, 8), dtype=np.uint8)
+    pixels[:, :, :3] = bgr
+    grey = pixels[:, :, 3]
+    energy = pixels[:, :, 4:6].view(np.int16)[:, :, 0]
+    source_cols = pixels[:, :, 6:].view(np.uint16)[:, :, 0]
+    words = pixels.view(np.uint64)[:, :, 0]
+    grey[:] = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+    energy[:] = get_sobel_gradient(np.ascontiguousarray(grey))
+    if seam_order is not None:
+        source_cols[:] = np.arange(w, dtype=np.uint16)
+    buffers = get_seam_buffers(h, w)
+    row_indices = buffers.row_offsets
+    width = w
     for seam_i in range(n_seams):
-        absolute_seam = get_absolute_seam(energy)
-        grey = np.delete(grey, absolute_seam).reshape((h, w - seam_i - 1))
-        b = np.delete(b, absolute_seam).reshape((h, w - seam_i - 1))
-        g = np.delete(g, absolute_seam).reshape((h, w - seam_i - 1))
-        r = np.delete(r, absolute_seam).reshape((h, w - seam_i - 1))
-        relative_seam = [col % (w - seam_i) for col in absolute_seam]
-        beyond_left_seam_span = max(0, min(relative_seam) - 2)
-        beyond_right_seam_span = min(w - seam_i, max(relative_seam) + 2)
-        seam_width_e = get_sobel_gradient(grey[:, beyond_left_seam_span:beyond_right_seam_span])
+        seam = get_relative_seam(energy[:, :width], buffers)
+        seam_left, seam_right = int(seam.min()), int(seam.max())
+        if seam_order is not None:
+            seam_order[row_indices, source_cols[row_indices, seam]] = seam_i
+        # each row moves left by one from its seam's column on, which is one memmove a row
+        for row, col in enumerate(seam.tolist()):
+            words[row, col:width - 1] = words[row, col + 1:width]
+        width -= 1
+        # only the energy of pixels beside the seam changes, and Sobel needs one more column either side of them
+        beyond_left_seam_span = max(0, seam_left - 2)
+        beyond_right_seam_span = min(width, seam_right + 2)
+        seam_width_e = get_sobel_gradient(np.ascontiguousarray(grey[:, beyond_left_seam_span:beyond_right_seam_span]))
         if beyond_left_seam_span != 0:
             seam_width_e = seam_width_e[:, 1:]
             beyond_left_seam_span += 1
-        if beyond_right_seam_span != w - seam_i:
+        if beyond_right_seam_span != width:
             seam_width_e = seam_width_e[:, :-1]
             beyond_right_seam_span -= 1
-        energy = np.hstack((energy[:, :beyond_left_seam_span], seam_width_e, energy[:, beyond_right_seam_span + 1:]))
-    return np.stack([b, g, r], axis=2)
+        energy[:, beyond_left_seam_span:beyond_right_seam_span] = seam_width_e
+    return pixels, width
+
+
+def get_carved_image(bgr, n_seams):
+    pixels, width = carve_pixels(bgr, n_seams)
+    return np.ascontiguousarray(pixels[:, :width, :3])
+
+
+def get_seam_order(bgr, n_seams=None):
+    # the seam in which each pixel is removed, counting from 0, or n_seams for the pixels which are never removed
+    h, w, c = bgr.shape
+    if w > np.iinfo(np.uint16).max + 1:
+        raise ValueError('Only images up to 65536 pixels wide have a seam order.')
+    n_seams = w - 1 if n_seams is None else n_seams
+    seam_order = np.full((h, w), n_seams, dtype=np.int16 if n_seams <= np.iinfo(np.int16).max else np.int32)
+    carve_pixels(bgr, n_seams, seam_order)
+    return seam_order
+
+
+def get_retargeted_image(bgr, seam_order, width):
+    # the same image as get_carved_image(bgr, w - width), from the pixels which its seams do not remove
+    h, w, c = bgr.shape
+    is_kept = seam_order >= w - width
+    if not 0 < width <= w or np.count_nonzero(is_kept) != h * width:
+        raise ValueError('The seam order does not reach that width.')
+    return bgr[is_kept].reshape((h, width, c))
 
 
 if __name__ == '__main__':
-    cv2.imwrite(argv[2], get_carved_image(cv2.imread(argv[1]), int(argv[3])).astype(np.uint8))
+    if argv[1] == '--order':
+        n_seams = int(argv[4]) if len(argv) > 4 else None
+        np.save(argv[3], get_seam_order(cv2.imread(argv[2]), n_seams))
+    elif argv[1] == '--retarget':
+        cv2.imwrite(argv[4], get_retargeted_image(cv2.imread(argv[2]), np.load(argv[3]), int(argv[5])))
+    else:
+        cv2.imwrite(argv[2], get_carved_image(cv2.imread(argv[1]), int(argv[3])))
@@ -0,0 +1,68 @@
+"""
+Kyle Maclean
+Tests for Seam Carving with Dynamic Programming
+October 2026
+"""
+
+import numpy as np
+from unittest import TestCase
+
+import sc
+
+
+def get_min_seam_cost(e):
+    # the DP of the paper, over int64 costs which cannot overflow
+    M = e[0].astype(np.int64)
+    for row in range(1, len(e)):
+        previous_costs = M.copy()
+        previous_costs[:-1] = np.minimum(previous_costs[:-1], M[1:])
+        previous_costs[1:] = np.minimum(previous_costs[1:], M[:-1])
+        M = e[row] + previous_costs
+    return int(M.min())
+
+
+class UnitTests(TestCase):
+    def test_seam_correctness(self):
+        rng = np.random.default_rng()
+        # rows * max_energy is far beyond int16, which the costs of a tall image used to overflow
+        for rows, cols in [(1, 5), (2, 2), (10, 1), (50, 3), (3000, 40)]:
+            e = rng.integers(0, sc.max_energy + 1, (rows, cols)).astype(np.int16)
+            seam = sc.get_relative_seam(e)
+            self.assertEqual(rows, len(seam))
+            self.assertTrue(np.all(np.abs(np.diff(seam)) <= 1))
+            self.assertTrue(np.all((0 <= seam) & (seam < cols)))
+            self.assertEqual(get_min_seam_cost(e), int(e[np.arange(rows), seam].astype(np.int64).sum()))
+            absolute_seam = sc.get_absolute_seam(e)
+            self.assertEqual(list(seam), list(absolute_seam % cols))
+            self.assertEqual(list(range(rows)), list(absolute_seam // cols))
+        self.assertEqual(np.int32, sc.get_seam_buffers(3000, 40).costs.dtype)
+        self.assertEqual(np.int64, sc.get_seam_buffers(2 ** 21, 1).costs.dtype)
+
+    def test_carve_correctness(self):
+        rng = np.random.default_rng()
+        bgr = rng.integers(0, 256, (12, 16, 3), dtype=np.uint8)
+        carved = sc.get_carved_image(bgr, 5)
+        self.assertEqual((12, 11, 3), carved.shape)
+        self.assertEqual(np.uint8, carved.dtype)
+        # each row loses 5 of its pixels, and keeps the rest in order
+        for row in range(12):
+            pixels = iter(tuple(pixel) for pixel in bgr[row])
+            self.assertTrue(all(tuple(pixel) in pixels for pixel in carved[row]))
+
+    def test_retarget_correctness(self):
+        rng = np.random.default_rng()
+        bgr = rng.integers(0, 256, (12, 16, 3), dtype=np.uint8)
+        seam_order = sc.get_seam_order(bgr)
+        self.assertEqual(np.int16, seam_order.dtype)
+        # every row loses one pixel to each seam, and keeps one which no seam removes
+        for row in seam_order:
+            self.assertEqual(list(range(16)), sorted(row))
+        for width in range(1, 17):
+            self.assertTrue(np.array_equal(sc.get_carved_image(bgr, 16 - width),
+                                           sc.get_retargeted_image(bgr, seam_order, width)))
+        partial_seam_order = sc.get_seam_order(bgr, 4)
+        retargeted = sc.get_retargeted_image(bgr, partial_seam_order, 13)
+        self.assertTrue(np.array_equal(sc.get_carved_image(bgr, 3), retargeted))
+        for width in [0, 11, 17]:
+            with self.assertRaises(ValueError):
+                sc.get_retargeted_image(bgr, partial_seam_order, width)